@@ -0,0 +1,79 @@
+import pandas as pd
+
+import artifacts
+import data_store
+import forecasting
+import location_forecasting
+import model_registry
+import rollups
+
+
+# Headless entry points for other systems: plain DataFrames, no Streamlit.
+# Precomputed artifacts from batch.py are used when they match the data.
+
+
+# Forecast results precomputed for this data version and horizon, by category
+def precomputed_forecasts(data_version, horizon=12):
+    frame = artifacts.read('forecasts', data_version)
+    document = artifacts.manifest()
+    if frame is None or document.get('horizon') != horizon:
+        return {}
+    # Only forecasts made with the model file that is installed now
+    models = document.get('models', {})
+    return {
+        feature: forecasting.frame_result(rows)
+        for feature, rows in frame.groupby('feature', sort=False)
+        if models.get(feature) == model_registry.model_version(forecasting.FORECAST_MODELS[feature])
+    }
+
+
+# Forecasts per category, from artifacts when fresh, keyed by category
+def forecast_results(features=None, horizon=12):
+    features = list(forecasting.FORECAST_MODELS) if features is None else list(features)
+    precomputed = precomputed_forecasts(data_store.data_version('bulanan'), horizon)
+    results = {feature: precomputed[feature] for feature in features if feature in precomputed}
+
+    missing = {feature: forecasting.FORECAST_MODELS[feature] for feature in features if feature not in results}
+    if missing:
+        results.update(forecasting.forecast_all(data_store.load_bulanan(), models=missing, horizon=horizon))
+    return {feature: results[feature] for feature in features}
+
+
+# Function to get forecasts as one long frame: feature, series, Date, value
+def forecasts(features=None, horizon=12):
+    results = forecast_results(features, horizon)
+    return pd.concat([forecasting.result_frame(result) for result in results.values()], ignore_index=True)
+
+
+def forecast(feature, horizon=12):
+    if feature not in forecasting.FORECAST_MODELS:
+        raise KeyError(f"Unknown category: {feature}")
+    return forecasts([feature], horizon)
+
+
+# Forecast of one category at one location from its persisted model
+def location_forecast(location, feature, freq='W', horizon=12):
+    return location_forecasting.forecast(location, feature, freq, horizon)
+
+
+def location_models():
+    return location_forecasting.available()
+
+
+# Function to get a rollup (see rollups.ROLLUPS), filtered like the dashboard
+def rollup(name, filters=None):
+    if name not in rollups.ROLLUPS:
+        raise KeyError(f"Unknown rollup: {name}")
+    return data_store.filter_frame(rollups.get(name), data_store.active_filters(filters or {}))
+
+
+def yearly(filters=None):
+    return rollups.yearly(filters or {})
+
+
+def monthly(filters=None):
+    return rollups.monthly(filters or {})
+
+
+def location_totals(filters=None):
+    return rollups.location_totals(filters or {}).reset_index()
@@ -0,0 +1,196 @@
+import asyncio
+import json
+import sys
+from urllib.parse import parse_qs
+
+import pandas as pd
+
+import analytics
+import artifacts
+import data_store
+import exports
+import forecasting
+import profiler
+import rollups
+import storage
+import warmup
+
+
+# HTTP/JSON API over analytics.py, as a plain ASGI app:
+#   uvicorn api:app --port 8000
+#
+# GET /health                 manifest of the last batch run and warm-up progress
+# GET /forecasts              all category forecasts (?horizon=12)
+# GET /forecasts/<category>   one category forecast (?horizon=12)
+# GET /forecasts/<lokasi>/<category>
+#                             forecast of one category at one location, from
+#                             its persisted model (?freq=W|D&horizon=12)
+# GET /export/<dataset>.<fmt>
+#                             a dataset filtered by query parameters as a CSV,
+#                             Parquet or Excel file; CSV is streamed in chunks
+#                             (e.g. /export/harian.csv?Lokasi=Jatirejo)
+# GET /locations/models       persisted per-location models
+# GET /metrics                profiler totals as Prometheus text (requests are
+#                             profiled with SMARTWASTE_PROFILE=1)
+# GET /rollups/<name>         a rollup, filtered by query parameters
+#                             (e.g. /rollups/bulanan?Tahun=2023&Bulan=January&Bulan=February)
+
+
+def _records(df):
+    # ISO dates and plain numbers, as pandas writes them for JSON. Periods
+    # (e.g. 'Periode' of lokasi_bulanan) and categories are written as text.
+    text = [column for column, dtype in df.dtypes.items() if isinstance(dtype, (pd.PeriodDtype, pd.CategoricalDtype))]
+    df = df.assign(**{column: df[column].astype(str) for column in text})
+    return json.loads(df.to_json(orient='records', date_format='iso'))
+
+
+def _filter_values(column, values):
+    if column in ('Tahun', 'rows') or column in rollups.CATEGORIES:
+        return [int(value) for value in values]
+    if column == 'Tanggal':
+        # One day, like the dashboard date filter
+        return pd.Timestamp(values[-1]).date()
+    if column == 'Periode':
+        return [pd.Period(value, freq='M') for value in values]
+    return values
+
+
+def _horizon(params):
+    return int(params.pop('horizon', ['12'])[0])
+
+
+def route(path, params):
+    parts = [part for part in path.strip('/').split('/') if part]
+    if parts == ['health']:
+        return 200, {'status': 'ok', 'artifacts': artifacts.manifest(), 'warmup': warmup.status()}
+    if parts == ['locations', 'models']:
+        return 200, _records(analytics.location_models())
+    if len(parts) == 3 and parts[0] == 'forecasts':
+        horizon = _horizon(params)
+        freq = params.pop('freq', ['W'])[0]
+        try:
+            return 200, _records(analytics.location_forecast(parts[1], parts[2], freq, horizon))
+        except FileNotFoundError as error:
+            return 404, {'error': str(error)}
+    if parts and parts[0] == 'forecasts' and len(parts) <= 2:
+        horizon = _horizon(params)
+        if len(parts) == 1:
+            return 200, _records(analytics.forecasts(horizon=horizon))
+        if parts[1] not in forecasting.FORECAST_MODELS:
+            return 404, {'error': f"Unknown category: {parts[1]}"}
+        return 200, _records(analytics.forecast(parts[1], horizon=horizon))
+    if len(parts) == 2 and parts[0] == 'rollups':
+        if parts[1] not in rollups.ROLLUPS:
+            return 404, {'error': f"Unknown rollup: {parts[1]}"}
+        filters = {column: _filter_values(column, values) for column, values in params.items()}
+        return 200, _records(analytics.rollup(parts[1], filters))
+    return 404, {'error': f"Not found: {path}"}
+
+
+# (dataset, format) of an /export path, or None for other paths
+def _export_target(path):
+    parts = [part for part in path.strip('/').split('/') if part]
+    if len(parts) != 2 or parts[0] != 'export':
+        return None
+    dataset, _, fmt = parts[1].partition('.')
+    return dataset, fmt
+
+
+# Cached files are sent as they are; misses are streamed chunk by chunk
+def _export_pieces(dataset, fmt, filters):
+    data = exports.cached(dataset, filters, fmt)
+    if data is not None:
+        return iter([data])
+    return exports.stream(data_store.query(dataset, filters), fmt)
+
+
+async def _send_export(send, file_name, mime, pieces):
+    await send({
+        'type': 'http.response.start',
+        'status': 200,
+        'headers': [
+            (b'content-type', mime.encode()),
+            (b'content-disposition', f'attachment; filename="{file_name}"'.encode()),
+        ],
+    })
+    loop = asyncio.get_running_loop()
+    while True:
+        piece = await loop.run_in_executor(None, next, pieces, None)
+        if piece is None:
+            break
+        await send({'type': 'http.response.body', 'body': piece, 'more_body': True})
+    await send({'type': 'http.response.body', 'body': b''})
+
+
+# One profiled run per request, named after the first path segment
+def _profiled_route(path, params):
+    with profiler.run('api /' + path.strip('/').split('/')[0]):
+        return route(path, params)
+
+
+async def _send(send, status, payload, content_type):
+    await send({
+        'type': 'http.response.start',
+        'status': status,
+        'headers': [(b'content-type', content_type), (b'content-length', str(len(payload)).encode())],
+    })
+    await send({'type': 'http.response.body', 'body': payload})
+
+
+async def _send_json(send, status, body):
+    await _send(send, status, json.dumps(body).encode('utf-8'), b'application/json')
+
+
+async def app(scope, receive, send):
+    if scope['type'] == 'lifespan':
+        while True:
+            message = await receive()
+            if message['type'] == 'lifespan.startup':
+                if warmup.ENABLED:
+                    warmup.start()
+                await send({'type': 'lifespan.startup.complete'})
+            elif message['type'] == 'lifespan.shutdown':
+                forecasting.shutdown_pools()
+                await send({'type': 'lifespan.shutdown.complete'})
+                return
+
+    if scope['type'] != 'http':
+        return
+    if scope['method'] != 'GET':
+        await _send_json(send, 405, {'error': 'Method not allowed'})
+        return
+
+    if scope['path'] == '/metrics':
+        await _send(send, 200, profiler.prometheus().encode('utf-8'), b'text/plain; version=0.0.4')
+        return
+
+    params = parse_qs(scope.get('query_string', b'').decode('utf-8'))
+    target = _export_target(scope['path'])
+    if target is not None:
+        dataset, fmt = target
+        if dataset not in storage.SCHEMAS or fmt not in exports.FORMATS:
+            await _send_json(send, 404, {'error': f"Unknown export: {dataset}.{fmt}"})
+            return
+        try:
+            filters = {column: _filter_values(column, values) for column, values in params.items()}
+            pieces = await asyncio.get_running_loop().run_in_executor(None, _export_pieces, dataset, fmt, filters)
+        except (KeyError, ValueError) as error:
+            await _send_json(send, 400, {'error': str(error)})
+            return
+        await _send_export(send, f"{dataset}{exports.FORMATS[fmt][0]}", exports.FORMATS[fmt][1], pieces)
+        return
+
+    try:
+        # Forecasts and rollups are blocking pandas work: keep the event loop free
+        status, body = await asyncio.get_running_loop().run_in_executor(None, _profiled_route, scope['path'], params)
+    except (KeyError, ValueError) as error:
+        status, body = 400, {'error': str(error)}
+    await _send_json(send, status, body)
+
+
+if __name__ == '__main__':
+    try:
+        import uvicorn
+    except ImportError:
+        sys.exit("uvicorn is required to serve the API: pip install uvicorn")
+    uvicorn.run(app, host='127.0.0.1', port=8000)
@@ -1,8 +1,17 @@
 import streamlit as st
 import pandas as pd
-import plotly.graph_objects as go
-import pickle
-from plotly.subplots import make_subplots
+
+import analytics
+import charts
+import data_store
+import exports
+import forecasting
+import ingest
+import kalender
+import model_registry
+import profiler
+import rollups
+import warmup
 
 
 
@@ -26,231 +35,142 @@ def add_footer():
     """
     st.markdown(footer, unsafe_allow_html=True)
 
-@st.cache_data
-def convert_df(df):
-    # IMPORTANT: Cache the conversion to prevent computation on every rerun
-    return df.to_csv().encode("utf-8")
+# Tombol download data hasil filter dalam format pilihan pengguna; file
+# di-cache per (filter, versi data) oleh exports.py
+def download_data(dataset, filters, df, file_name, key):
+    fmt = st.radio('Format', list(exports.FORMATS), horizontal=True, key=key)
+    extension, mime = exports.FORMATS[fmt]
+    st.download_button(
+        label=f"Download data as {fmt.upper()}",
+        data=exports.export(dataset, filters, fmt, df=df),
+        file_name=file_name + extension,
+        mime=mime,
+    )
+
+# Tampilkan plot, dengan waktu serialisasi Plotly tercatat di profiler
+def show_chart(fig, container=st):
+    with profiler.stage('plotly_chart'):
+        container.plotly_chart(fig)
 
 # Fungsi untuk menampilkan plot menggunakan Plotly di Streamlit
-def sampah_tahunan(df):
-    # Kelompokkan data berdasarkan tahun
-    grouped_data = df.groupby("Tahun").sum().reset_index()
-
-    # Buat plot dengan menggunakan Plotly
-    fig = go.Figure()
-
-    # Tambahkan trace untuk masing-masing kategori sampah dengan jenis bar
-    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Sampah Daun"], name='Sampah Daun', marker_color='#1f77b4'))  # blue
-    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Sampah Sayuran"], name='Sampah Sayuran', marker_color='#ff7f0e'))  # orange
-    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Sampah Fermentasi"], name='Sampah Fermentasi', marker_color='#2ca02c'))  # green
-    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Daun Terolah"], name='Daun Terolah', marker_color='#9467bd'))  # purple
-    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Kompos Jadi"], name='Kompos Jadi', marker_color='#17becf'))  # cyan
-
-    # Update layout
-    fig.update_layout(
-        title='Perbandingan Sampah Daun, Sampah Sayuran, Sampah Fermentasi, Daun Terolah, dan Kompos Jadi per Tahun',
-        xaxis_title='Tahun',
-        yaxis_title='Jumlah Sampah',
-        barmode='group',  # Mengelompokkan bar untuk setiap tahun
-        legend_title='Kategori Sampah',
-        font=dict(size=12, color='black'),  # Ukuran dan warna font
-    )
+@profiler.timed()
+def sampah_tahunan(filters):
+    fig = charts.cached_figure('tahunan', filters, data_store.data_version('bulanan'),
+                               lambda: charts.yearly_figure(rollups.yearly(filters)))
 
     # Tampilkan plot menggunakan st.plotly_chart
-    st.plotly_chart(fig)
-
-def sampah_bulanan(df):
-    # Convert 'Tahun' and 'Bulan' columns to a single datetime column
-    df['Date'] = pd.to_datetime(df['Tahun'].astype(str) + '-' + df['Bulan'])
-
-    # Plotting with Plotly
-    fig = go.Figure()
-
-    # Add traces for each type of waste
-    fig.add_trace(go.Scatter(x=df['Date'], y=df['Sampah Daun'], mode='lines+markers', name='Sampah Daun'))
-    fig.add_trace(go.Scatter(x=df['Date'], y=df['Sampah Sayuran'], mode='lines+markers', name='Sampah Sayuran'))
-    fig.add_trace(go.Scatter(x=df['Date'], y=df['Sampah Anorganik'], mode='lines+markers', name='Sampah Anorganik'))
-    fig.add_trace(go.Scatter(x=df['Date'], y=df['Daun Terolah'], mode='lines+markers', name='Daun Terolah'))
-    fig.add_trace(go.Scatter(x=df['Date'], y=df['Sampah Fermentasi'], mode='lines+markers', name='Sampah Fermentasi'))
-    fig.add_trace(go.Scatter(x=df['Date'], y=df['Kompos Jadi'], mode='lines+markers', name='Kompos Jadi'))
-
-    # Update layout
-    fig.update_layout(
-        title='Perbandingan Sampah per Bulan',
-        xaxis_title='Date',
-        yaxis_title='Jumlah Sampah',
-        legend=dict(x=0, y=1),
-        xaxis=dict(showgrid=True),
-        yaxis=dict(showgrid=True)
-    )
-    # Tampilkan plot menggunakan st.plotly_chart
-    st.plotly_chart(fig)
-
-
-
-def forecast(df, model, feature):
-    df['Date'] = pd.to_datetime(df[['Tahun', 'Bulan']].assign(DAY=1).astype(str).agg('-'.join, axis=1))
-    df.set_index('Date', inplace=True)
-    ts_data = df[feature].dropna()
-
-    # Load the model from the file
-    with open(model, 'rb') as file:
-        loaded_model = pickle.load(file)
-
-    # Assuming ts_data and df are defined previously
-    # ts_data: the original time series data
-    # df: a DataFrame that includes the in-sample forecast
-
-    # Calculate in-sample forecast
-    df['forecast_in_sample'] = loaded_model.predict_in_sample()
-
-    # Calculate out-of-sample forecast
-    forecast_out_sample = loaded_model.predict(n_periods=12)  # Forecast for the next 12 months
-
-    # Create the index for the out-sample forecast
-    out_sample_index = pd.date_range(start=ts_data.index[-1], periods=13, freq='M')[1:]
-
-    # Combine in-sample and out-sample forecasts
-    combined_forecast = pd.concat([df['forecast_in_sample'], pd.Series(forecast_out_sample, index=out_sample_index)])
-
-    # Plotting with Plotly
-    fig = make_subplots()
-
-    # Original time series data
-    fig.add_trace(go.Scatter(
-        x=ts_data.index,
-        y=ts_data,
-        mode='lines+markers',
-        name='Original',
-        line=dict(color='blue'),
-        marker=dict(symbol='circle')
-    ))
-
-    # In-sample forecast
-    fig.add_trace(go.Scatter(
-        x=df.index,
-        y=df['forecast_in_sample'],
-        mode='lines+markers',
-        name='Forecast (In-sample)',
-        line=dict(color='green'),
-        marker=dict(symbol='circle')
-    ))
-
-    # Out-of-sample forecast
-    fig.add_trace(go.Scatter(
-        x=out_sample_index,
-        y=forecast_out_sample,
-        mode='lines+markers',
-        name='Forecast (Out-sample)',
-        line=dict(color='green'),
-        marker=dict(symbol='circle')
-    ))
-
-    # Adding a connection between the last in-sample point and the first out-sample point
-    fig.add_trace(go.Scatter(
-        x=[df.index[-1], out_sample_index[0]],
-        y=[df['forecast_in_sample'].iloc[-1], forecast_out_sample[0]],
-        mode='lines+markers',
-        line=dict(color='green'),
-        marker=dict(symbol='circle'),
-        showlegend=False
-    ))
-
-    # Update layout
-    fig.update_layout(
-        title=f'Time Series {feature} Forecast',
-        xaxis_title='Date',
-        yaxis_title='Value',
-        legend=dict(x=0, y=1),
-        xaxis=dict(showgrid=True),
-        yaxis=dict(showgrid=True)
-    )
+    show_chart(fig)
+
+@profiler.timed()
+def sampah_bulanan(filters):
+    fig = charts.cached_figure('bulanan', filters, data_store.data_version('bulanan'),
+                               lambda: charts.monthly_figure(rollups.monthly(filters)))
 
     # Tampilkan plot menggunakan st.plotly_chart
-    st.plotly_chart(fig)
+    show_chart(fig)
 
 # Function to create and display pie chart for a location
-def create_pie_chart(df, location):
-    # Filter data for the selected location
-    df_location = df[df['Lokasi'] == location]
-
-    # Sum up waste categories
-    total_sampah_daun = df_location['Sampah Daun'].sum()
-    total_sampah_sayuran = df_location['Sampah Sayuran'].sum()
-    total_sampah_fermentasi = df_location['Sampah Fermentasi'].sum()
-    total_daun_terolah = df_location['Daun Terolah'].sum()
-    total_kompos_jadi = df_location['Kompos Jadi'].sum()
-
-    # Create pie chart
-    fig = go.Figure()
-
-    # Add trace for each waste category
-    fig.add_trace(go.Pie(labels=['Sampah Daun', 'Sampah Sayuran', 'Sampah Fermentasi', 'Daun Terolah', 'Kompos Jadi'],
-                         values=[total_sampah_daun, total_sampah_sayuran, total_sampah_fermentasi, total_daun_terolah, total_kompos_jadi],
-                         hole=0.3,
-                         marker=dict(line=dict(color='#000000', width=1))
-                         ))
-
-    # Update layout
-    fig.update_layout(
-        title=f'Komposisi Sampah di Lokasi {location}',
-        legend_title='Kategori Sampah',
-        uniformtext_minsize=12, uniformtext_mode='hide'
-    )
+@profiler.timed()
+def create_pie_chart(filters, location):
+    fig = charts.cached_figure(('pie', location), filters, data_store.data_version('harian'),
+                               lambda: charts.pie_figure(rollups.location_totals(filters), location))
 
     # Display pie chart
-    st.plotly_chart(fig)
-
-# Function to load data from an Excel file
-def load_data(file_path):
-    try:
-        df = pd.read_excel(file_path, index_col=0)
-        st.write("Data loaded successfully")
-        return df
-    except Exception as e:
-        st.error(f"Error loading data: {e}")
-        return pd.DataFrame()
+    show_chart(fig)
 
-# Function to save data to an Excel file
-def save_data(df, file_path):
+# Function to write one record change and refresh the page
+def write_record(change, *args, dataset='bulanan'):
     try:
-        df.to_excel(file_path, index=False)
+        change(dataset, *args)
         st.write("Data saved successfully")
         st.experimental_rerun()
     except Exception as e:
         st.error(f"Error saving data: {e}")
 
 # Function to add a new record
-def add_record(df, record):
-    # Convert record into a list of dictionaries
-    records_list = [record]
-
-    # Convert list of dictionaries into a DataFrame
-    df_baru = pd.DataFrame(records_list)
-
-    # Concatenate new DataFrame with existing DataFrame
-    df = pd.concat([df, df_baru], ignore_index=True)
-    return df
+def add_record(record):
+    write_record(data_store.add_record, record)
 
 # Function to update a record
-def update_record(df, record, record_id):
-    if record_id in df.index:
-        df.loc[record_id] = record
-    return df
+def update_record(record, record_id):
+    write_record(data_store.update_record, record_id, record)
 
 # Function to delete a record
-def delete_record(df, record_id):
-    return df.drop(record_id, errors='ignore')
-
-# Main function
-def main():
-    # Set page configuration
-    st.set_page_config(layout="wide")
-
-    
+def delete_record(record_id):
+    write_record(data_store.delete_record, record_id)
+
+# Grafik forecast untuk semua kategori sampah
+@profiler.timed()
+def forecast_charts():
+    # Model hanya dimuat saat prediksinya belum ada di cache (lokal maupun bersama)
+    # Siapkan tempat untuk setiap grafik forecast sesuai urutan tampilan
+    col41, col42 = st.columns(2)
+    col51, col52 = st.columns(2)
+    forecast_slots = {
+        'Sampah Daun': col41,
+        'Sampah Sayuran': col42,
+        'Daun Terolah': col51,
+        'Sampah Fermentasi': col52,
+        'Kompos Jadi': st.container(),
+    }
 
+    # Grafik yang sudah ada di cache atau sudah dihitung oleh batch.py langsung ditampilkan,
+    # sisanya dihitung secara paralel dan ditampilkan masing-masing begitu selesai
+    version = data_store.data_version('bulanan')
+    precomputed = None
+    pending = {}
+    # Kunci cache memakai versi data dan versi model, agar model hasil retraining langsung terpakai
+    versions = {
+        feature: (version, model_registry.model_version(path))
+        for feature, path in forecasting.FORECAST_MODELS.items()
+    }
+    for feature, slot in forecast_slots.items():
+        fig = charts.get_figure(('forecast', feature), {}, versions[feature])
+        if fig is None:
+            if precomputed is None:
+                precomputed = analytics.precomputed_forecasts(version)
+            if feature in precomputed:
+                fig = charts.put_figure(('forecast', feature), {}, versions[feature], charts.forecast_figure(precomputed[feature]))
+        if fig is None:
+            pending[feature] = forecasting.FORECAST_MODELS[feature]
+        else:
+            show_chart(fig, slot)
+    # Dataset bulanan hanya dimuat bila ada forecast yang harus dihitung
+    if pending:
+        with profiler.stage('forecasting.compute'):
+            for result in forecasting.iter_forecasts(data_store.load_bulanan(), models=pending):
+                fig = charts.put_figure(('forecast', result['feature']), {}, versions[result['feature']], charts.forecast_figure(result))
+                show_chart(fig, forecast_slots[result['feature']])
+
+# Panel debug tersembunyi (?debug=1): waktu tiap tahap, memori puncak dan cache
+def debug_panel(run):
+    with st.sidebar.expander("Profiler", expanded=True):
+        stages = pd.DataFrame(run.stages)
+        stages['stage'] = ['\u00a0\u00a0' * depth + name for depth, name in zip(stages['depth'], stages['stage'])]
+        stages['ms'] = (stages['seconds'] * 1000).round(1)
+        stages['peak MiB'] = (stages['peak_bytes'] / 2**20).round(1)
+        st.dataframe(stages[['stage', 'ms', 'peak MiB']], hide_index=True)
+
+        counters = pd.Series(run.counters, dtype='int64').sort_index()
+        st.dataframe(counters.rename('count'))
+
+        # Model di registry: waktu muat dan memori per model
+        models = model_registry.model_stats()
+        models['load ms'] = (models['load_seconds'] * 1000).round(1)
+        models['MiB'] = (models['memory_bytes'] / 2**20).round(2)
+        st.dataframe(models[['model', 'sha256', 'load ms', 'MiB']], hide_index=True)
+
+        # Memori dataset sebelum dan sesudah skema ringkas
+        memory = data_store.memory_report()
+        memory['KiB before'] = (memory['bytes_before'] / 2**10).round(1)
+        memory['KiB after'] = (memory['bytes_after'] / 2**10).round(1)
+        st.dataframe(memory[['dataset', 'rows', 'KiB before', 'KiB after']], hide_index=True)
+        st.code(profiler.prometheus(), language='text')
+
+# Halaman yang dipilih di sidebar
+def page():
     # setting sidebar
-    option = st.sidebar.selectbox("Operation", ["Dashboard", "Input Data"])
+    option = st.sidebar.selectbox("Operation", ["Dashboard", "Input Data"], key="operation")
 
     if option == "Dashboard":
         # Styling for header
@@ -272,128 +192,59 @@ def main():
         col11, col12 = st.columns(2)
         
         with col11:
-            # Dataset
-            df_bulanan = pd.read_excel("Data/Laporan-hasil-Rumah-Kompos-gabungan.xlsx")
-            
-            # Konversi kolom Tahun ke tipe data datetime
-            df_bulanan['Tahun'] = pd.to_datetime(df_bulanan['Tahun'], format='%Y')
-
-            # Tampilkan hanya tahun saja
-            df_bulanan['Tahun'] = df_bulanan['Tahun'].dt.year
-
             # Multiselect untuk memilih tahun
-            selected_years = st.multiselect('Pilih Tahun', df_bulanan['Tahun'].unique())
+            selected_years = st.multiselect('Pilih Tahun', data_store.distinct('bulanan', 'Tahun'))
 
             # Multiselect untuk memilih bulan
-            selected_months = st.multiselect('Pilih Bulan', df_bulanan['Bulan'].unique())
-
-            # Filter DataFrame berdasarkan pilihan pengguna
-            if selected_years and not selected_months:
-                # Filter hanya berdasarkan tahun yang dipilih
-                df_bulanan_filtered = df_bulanan[df_bulanan['Tahun'].isin(selected_years)]
-            elif selected_months and not selected_years:
-                # Filter hanya berdasarkan bulan yang dipilih
-                df_bulanan_filtered = df_bulanan[df_bulanan['Bulan'].isin(selected_months)]
-            elif selected_years and selected_months:
-                # Filter berdasarkan tahun dan bulan yang dipilih
-                mask = (df_bulanan['Tahun'].isin(selected_years)) & (df_bulanan['Bulan'].isin(selected_months))
-                df_bulanan_filtered = df_bulanan[mask]
-            else:
-                # Jika tidak ada pilihan, tampilkan DataFrame secara keseluruhan
-                df_bulanan_filtered = df_bulanan
+            selected_months = st.multiselect('Pilih Bulan', data_store.distinct('bulanan', 'Bulan'))
+
+            # Filter DataFrame berdasarkan pilihan pengguna; pilihan kosong diabaikan
+            filters_bulanan = {'Tahun': selected_years, 'Bulan': selected_months}
+            df_bulanan_filtered = data_store.query('bulanan', filters_bulanan)
 
             # Tampilkan DataFrame hasil filter
             st.dataframe(df_bulanan_filtered)
 
-            # Button for downloading CSV
-            st.download_button(
-                label="Download data as CSV",
-                data= convert_df(df_bulanan_filtered),
-                file_name="data.csv",
-                mime="text/csv",
-            )
+            # Button for downloading CSV/Parquet/Excel
+            download_data('bulanan', filters_bulanan, df_bulanan_filtered, "data", key='format_bulanan')
         
         with col12:
-            # Dataset
-            df_harian = pd.read_csv("Data/Laporan hasil Rumah Kompos gabungan harian.csv")
-
-            # Ubah kolom 'Tanggal' menjadi datetime
-            df_harian['Tanggal'] = pd.to_datetime(df_harian['Tanggal'])
-
-            # Hapus kolom 'Bulan' dan 'Tahun'
-            df_harian.drop(columns=['Bulan', 'Tahun'], inplace=True)
-
-            # Ubah nama kolom 'Kompos' menjadi 'Lokasi'
-            df_harian.rename(columns={'Kompos': 'Lokasi'}, inplace=True)
-
-            # Ganti nilai 'kompos pasar kendal' menjadi 'Pasar Kendal' dan 'kompos jatirejo' menjadi 'Jatirejo'
-            df_harian['Lokasi'] = df_harian['Lokasi'].replace({'Kompos Pasar Kendal': 'Pasar Kendal', 'Kompos Jatirejo': 'Jatirejo'})
-
         # Input untuk memilih tanggal
-            min_date = df_harian['Tanggal'].min().date() if not df_harian.empty else pd.Timestamp.min.date()
-            max_date = df_harian['Tanggal'].max().date() if not df_harian.empty else pd.Timestamp.max.date()
+            first_date, last_date = data_store.value_range('harian', 'Tanggal')
+            min_date = first_date.date() if first_date is not None else pd.Timestamp.min.date()
+            max_date = last_date.date() if last_date is not None else pd.Timestamp.max.date()
 
             selected_date = st.date_input('Pilih Tanggal', min_value=min_date, max_value=max_date, value=None)
 
 
             # Multiselect untuk memilih lokasi
-            selected_locations = st.multiselect('Pilih Lokasi', df_harian['Lokasi'].unique())
-
-            # Filter DataFrame berdasarkan pilihan pengguna
-            if selected_date and not selected_locations:
-                # Filter hanya berdasarkan tanggal yang dipilih
-                df_harian_filtered = df_harian[df_harian['Tanggal'].dt.date == selected_date]
-            elif selected_locations and not selected_date:
-                # Filter hanya berdasarkan lokasi yang dipilih
-                df_harian_filtered = df_harian[df_harian['Lokasi'].isin(selected_locations)]
-            elif selected_date and selected_locations:
-                # Filter berdasarkan tanggal dan lokasi yang dipilih
-                mask = (df_harian['Tanggal'].dt.date == selected_date) & (df_harian['Lokasi'].isin(selected_locations))
-                df_harian_filtered = df_harian[mask]
-            else:
-                # Jika tidak ada pilihan, tampilkan DataFrame secara keseluruhan
-                df_harian_filtered = df_harian
+            selected_locations = st.multiselect('Pilih Lokasi', data_store.distinct('harian', 'Lokasi'))
+
+            # Filter DataFrame berdasarkan pilihan pengguna; pilihan kosong diabaikan
+            filters_harian = {'Tanggal': selected_date, 'Lokasi': selected_locations}
+            df_harian_filtered = data_store.query('harian', filters_harian)
 
             # Tampilkan DataFrame hasil filter
             st.dataframe(df_harian_filtered)
 
 
-            # Button for downloading CSV
-            st.download_button(
-                label="Download data as CSV",
-                data=convert_df(df_harian_filtered),
-                file_name="filtered_data.csv",
-                mime="text/csv",
-            )
+            # Button for downloading CSV/Parquet/Excel
+            download_data('harian', filters_harian, df_harian_filtered, "filtered_data", key='format_harian')
         
     # PLOT
         col21, col22 = st.columns(2)
         with col21:
-            sampah_tahunan(df_bulanan_filtered)
+            sampah_tahunan(filters_bulanan)
         with col22:
-            sampah_bulanan(df_bulanan_filtered)
+            sampah_bulanan(filters_bulanan)
 
         col31, col32 = st.columns(2)
         with col31:
-            create_pie_chart(df_harian_filtered, "Pasar Kendal")
+            create_pie_chart(filters_harian, "Pasar Kendal")
         with col32:
-            create_pie_chart(df_harian_filtered, "Jatirejo")
-        
-        col41, col42 = st.columns(2)
-        
-        with col41:
-            forecast(df_bulanan, "Model/model_sampahDaun.pkl", "Sampah Daun")
-        with col42:
-            forecast(df_bulanan, "Model/model_sampahSayuran.pkl", "Sampah Sayuran")
+            create_pie_chart(filters_harian, "Jatirejo")
         
-        col51, col52 = st.columns(2)
-
-        with col51:
-            forecast(df_bulanan, "Model/model_daunTerolah.pkl", "Daun Terolah")
-        with col52:
-            forecast(df_bulanan, "Model/model_sampahFermentasi.pkl", "Sampah Fermentasi")
-        
-        forecast(df_bulanan, "Model/model_komposJadi.pkl", "Kompos Jadi")
+        forecast_charts()
     
     elif option == "Input Data":
         # Styling for header
@@ -413,25 +264,16 @@ def main():
         st.markdown('<div class="header"><h1>Input Data</h1></div>', unsafe_allow_html=True)
 
         # Dataset
-        df_bulanan = pd.read_excel("Data/Laporan-hasil-Rumah-Kompos-gabungan.xlsx")
-        
-        # Konversi kolom Tahun ke tipe data datetime
-        df_bulanan['Tahun'] = pd.to_datetime(df_bulanan['Tahun'], format='%Y')
-
-        # Tampilkan hanya tahun saja
-        df_bulanan['Tahun'] = df_bulanan['Tahun'].dt.year
+        df_bulanan = data_store.load_bulanan()
 
         st.dataframe(df_bulanan)
 
-        tab1, tab2, tab3 = st.tabs(["Add Data" , "Update Data", "Delete Data"])
+        tab1, tab2, tab3, tab4 = st.tabs(["Add Data" , "Update Data", "Delete Data", "Import Data Harian"])
 
         with tab1:
             st.subheader("Add New Record")
             tahun = st.number_input("Tahun", min_value=2000, max_value=2100)
-            bulan_add = st.selectbox("Bulan", [
-                "January", "February", "March", "April", "May", "June",
-                "July", "August", "September", "October", "November", "December"
-            ])
+            bulan_add = st.selectbox("Bulan", kalender.MONTH_NAMES)
             sampah_daun = st.number_input("Sampah Daun", min_value=0)
             sampah_sayuran = st.number_input("Sampah Sayuran", min_value=0)
             sampah_anorganik = st.number_input("Sampah Anorganik", min_value=0)
@@ -449,8 +291,7 @@ def main():
                     'Sampah Fermentasi': sampah_fermentasi,
                     'Kompos Jadi': kompos_jadi
                 }
-                df_bulanan = add_record(df_bulanan, new_record)
-                save_data(df_bulanan, "Data/Laporan-hasil-Rumah-Kompos-gabungan.xlsx")
+                add_record(new_record)
                 st.success("Record added successfully")
                 
         with tab2:
@@ -458,10 +299,7 @@ def main():
             record_id = st.number_input("Enter ID of the record to update", min_value=0)
             if record_id in df_bulanan.index:
                 tahun = st.number_input("Tahun", min_value=2000, max_value=2100, value=int(df_bulanan.loc[record_id, 'Tahun']))
-                bulan_update = st.selectbox("Bulan", [
-            "January", "February", "March", "April", "May", "June",
-            "July", "August", "September", "October", "November", "December"
-            ], index=["January", "February", "March", "April", "May", "June", "July", "August", "September", "October", "November", "December"].index(df_bulanan.loc[record_id, 'Bulan']), key='update')
+                bulan_update = st.selectbox("Bulan", kalender.MONTH_NAMES, index=kalender.month_number(df_bulanan.loc[record_id, 'Bulan']) - 1, key='update')
                 sampah_daun = st.number_input("Sampah Daun", min_value=0, value=int(df_bulanan.loc[record_id, 'Sampah Daun']))
                 sampah_sayuran = st.number_input("Sampah Sayuran", min_value=0, value=int(df_bulanan.loc[record_id, 'Sampah Sayuran']))
                 sampah_anorganik = st.number_input("Sampah Anorganik", min_value=0, value=int(df_bulanan.loc[record_id, 'Sampah Anorganik']))
@@ -479,8 +317,7 @@ def main():
                         'Sampah Fermentasi': sampah_fermentasi,
                         'Kompos Jadi': kompos_jadi
                     }
-                    df_bulanan = update_record(df_bulanan, updated_record, record_id)
-                    save_data(df_bulanan,  "Data/Laporan-hasil-Rumah-Kompos-gabungan.xlsx")
+                    update_record(updated_record, record_id)
                     st.success("Record updated successfully")
             else:
                 st.error("Record not found")
@@ -489,12 +326,33 @@ def main():
             record_id = st.number_input("Enter ID of the record to delete", min_value=0)
             if record_id in df_bulanan.index:
                 if st.button("Delete"):
-                    df_bulanan = delete_record(df_bulanan, record_id)
-                    save_data(df_bulanan, "Data/Laporan-hasil-Rumah-Kompos-gabungan.xlsx")
+                    delete_record(record_id)
                     st.success("Record deleted successfully")
                     st.experimental_rerun()
             else:
                 st.error("Record not found")
+
+        with tab4:
+            st.subheader("Import Daily Logs")
+            uploaded_files = st.file_uploader("Upload CSV/XLSX files", type=['csv', 'xlsx'], accept_multiple_files=True)
+            if uploaded_files and st.button("Import"):
+                status = st.empty()
+
+                def show_progress(report):
+                    status.text(f"{report['read']} rows read ({report['read'] / max(report['seconds'], 1e-9):,.0f} rows/s)")
+
+                try:
+                    report, rejected = ingest.import_files(uploaded_files, progress=show_progress)
+                except ValueError as error:
+                    st.error(f"Import failed: {error}")
+                else:
+                    status.empty()
+                    st.success(
+                        f"{report['added']} records added, {report['duplicates']} duplicates skipped, "
+                        f"{report['rejected']} rejected ({report['rows_per_sec']:,.0f} rows/s)"
+                    )
+                    if len(rejected):
+                        st.dataframe(rejected)
         
 
     
@@ -502,6 +360,23 @@ def main():
     # Add footer
     add_footer()
 
+# Main function
+def main():
+    # Set page configuration
+    st.set_page_config(layout="wide")
+
+    # Warm-up di background untuk SMARTWASTE_WARMUP=1 (sekali per proses)
+    if warmup.ENABLED:
+        warmup.start()
+
+    # Profiler aktif untuk SMARTWASTE_PROFILE=1 atau ?debug=1
+    debug = st.experimental_get_query_params().get('debug') == ['1']
+    profiler.serve()
+    with profiler.run('rerun', enabled=profiler.ENABLED or debug) as run:
+        page()
+    if debug and run is not None:
+        debug_panel(run)
+
 # Run the main function
 if __name__ == "__main__":
     main()
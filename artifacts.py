@@ -0,0 +1,72 @@
+import datetime
+import json
+import os
+import tempfile
+
+import pandas as pd
+
+
+# Precomputed forecasts and rollups written by batch.py
+ARTIFACT_DIR = "artifacts"
+MANIFEST = "manifest.json"
+
+
+def artifact_path(name):
+    return os.path.join(ARTIFACT_DIR, f"{name}.parquet")
+
+
+def _atomic(path, write):
+    fd, tmp_path = tempfile.mkstemp(dir=ARTIFACT_DIR, prefix='.tmp-')
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Manifest of the last batch run, or None when nothing has been built
+def manifest():
+    path = os.path.join(ARTIFACT_DIR, MANIFEST)
+    if not os.path.exists(path):
+        return None
+    with open(path, encoding='utf-8') as file:
+        return json.load(file)
+
+
+# Function to write a set of artifacts, each tagged with the dataset version it
+# was computed from. The manifest is replaced last, so readers never match a
+# version against half-written files.
+def write(frames, versions, **info):
+    os.makedirs(ARTIFACT_DIR, exist_ok=True)
+    entries = {}
+    for name, (dataset, df) in frames.items():
+        _atomic(artifact_path(name), lambda tmp_path: df.to_parquet(tmp_path, index=False))
+        entries[name] = {'dataset': dataset, 'rows': len(df)}
+
+    document = {
+        'generated_at': datetime.datetime.now().isoformat(timespec='seconds'),
+        'versions': {dataset: list(version) for dataset, version in versions.items()},
+        'artifacts': entries,
+        **info,
+    }
+
+    def write_manifest(tmp_path):
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            json.dump(document, file, indent=2)
+    _atomic(os.path.join(ARTIFACT_DIR, MANIFEST), write_manifest)
+    return document
+
+
+# Function to read an artifact, or None when it is missing or was computed
+# from a different version of its dataset than data_version
+def read(name, data_version):
+    document = manifest()
+    if document is None or name not in document['artifacts']:
+        return None
+    dataset = document['artifacts'][name]['dataset']
+    if document['versions'].get(dataset) != list(data_version):
+        return None
+    return pd.read_parquet(artifact_path(name))
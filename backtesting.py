@@ -0,0 +1,127 @@
+import argparse
+import time
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pmdarima
+
+import data_store
+import forecasting
+import model_registry
+import retraining
+
+
+# Rolling-origin evaluation: for every origin t the model specification
+# (orders, intercept, solver) of the installed pickle is fitted on the first t
+# observations and asked for the next `horizon` months. The pickles themselves
+# were fitted on all the data, so they are not scored directly.
+
+
+# Function to fit one fold and forecast from its origin. Runs in a worker.
+def run_fold(params, train, horizon):
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        start = time.perf_counter()
+        model = pmdarima.ARIMA(**params).fit(train)
+        fitted = time.perf_counter()
+        forecast = np.asarray(model.predict(n_periods=horizon), dtype=np.float64)
+        predicted = time.perf_counter()
+    return forecast, fitted - start, predicted - fitted
+
+
+# Function to score forecasts against the actual values, all folds at once.
+# forecasts is (folds, horizon); months past the end of the data are NaN.
+def fold_errors(values, fold_origins, forecasts):
+    horizon = forecasts.shape[1]
+    positions = fold_origins[:, None] + np.arange(horizon)[None, :]
+    inside = positions < len(values)
+    actual = np.where(inside, values[np.minimum(positions, len(values) - 1)], np.nan)
+    absolute = np.abs(forecasts - actual)
+    # Months with zero waste have no percentage error
+    with np.errstate(divide='ignore', invalid='ignore'):
+        percentage = np.where(actual != 0, absolute / np.abs(actual), np.nan)
+    return absolute, percentage
+
+
+# Function to backtest every category model. Folds of all categories run in
+# parallel. Returns (scores per category and horizon step, timings per category).
+def backtest(df=None, features=None, horizon=6, initial=24, step=1, executor='process', max_workers=None):
+    if df is None:
+        df = data_store.load_bulanan()
+    features = list(forecasting.FORECAST_MODELS) if features is None else list(features)
+
+    plans = {}
+    for feature in features:
+        params = model_registry.get_model(forecasting.FORECAST_MODELS[feature]).get_params()
+        values = retraining.series(df, feature)
+        # Every origin leaves at least one month to score
+        plans[feature] = (params, values, np.arange(initial, len(values), step))
+
+    fold_args = [
+        (params, values[:origin], horizon)
+        for params, values, fold_origins in plans.values()
+        for origin in fold_origins
+    ]
+    if executor == 'sequential':
+        results = [run_fold(*args) for args in fold_args]
+    else:
+        pool_class = {'process': ProcessPoolExecutor, 'thread': ThreadPoolExecutor}[executor]
+        with pool_class(max_workers=max_workers) as pool:
+            results = list(pool.map(run_fold, *zip(*fold_args)))
+
+    scores, timings = [], []
+    start = 0
+    for feature, (_, values, fold_origins) in plans.items():
+        folds = results[start:start + len(fold_origins)]
+        start += len(fold_origins)
+        if not folds:
+            continue
+        forecasts = np.vstack([forecast for forecast, _, _ in folds])
+        absolute, percentage = fold_errors(values, fold_origins, forecasts)
+
+        with warnings.catch_warnings():
+            # Horizon steps with no scorable fold stay NaN
+            warnings.simplefilter('ignore', RuntimeWarning)
+            scores.append(pd.DataFrame({
+                'feature': feature,
+                'horizon': np.arange(1, horizon + 1),
+                'folds': np.sum(~np.isnan(absolute), axis=0),
+                'MAE': np.nanmean(absolute, axis=0),
+                'MAPE': np.nanmean(percentage, axis=0) * 100,
+            }))
+
+        fit_seconds = np.array([seconds for _, seconds, _ in folds])
+        predict_seconds = np.array([seconds for _, _, seconds in folds])
+        timings.append({
+            'feature': feature,
+            'folds': len(folds),
+            'fit_mean': fit_seconds.mean(),
+            'fit_total': fit_seconds.sum(),
+            'predict_mean': predict_seconds.mean(),
+            'predict_total': predict_seconds.sum(),
+        })
+
+    return pd.concat(scores, ignore_index=True), pd.DataFrame(timings)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Rolling-origin backtest of the forecast models')
+    parser.add_argument('--horizon', type=int, default=6, help='months forecast from each origin')
+    parser.add_argument('--initial', type=int, default=24, help='months in the first training window')
+    parser.add_argument('--step', type=int, default=1, help='months between origins')
+    parser.add_argument('--executor', choices=['sequential', 'thread', 'process'], default='process')
+    parser.add_argument('--workers', type=int)
+    args = parser.parse_args()
+
+    scores, timings = backtest(horizon=args.horizon, initial=args.initial, step=args.step,
+                               executor=args.executor, max_workers=args.workers)
+    with pd.option_context('display.width', 160, 'display.max_columns', None, 'display.max_rows', None):
+        print(scores.round(2).to_string(index=False))
+        print()
+        print(timings.round(4).to_string(index=False))
+
+
+if __name__ == '__main__':
+    main()
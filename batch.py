@@ -0,0 +1,60 @@
+import argparse
+import time
+
+import pandas as pd
+
+import artifacts
+import data_store
+import forecasting
+import model_registry
+import retraining
+import rollups
+
+
+# Function to precompute every category forecast and rollup into artifacts/
+def build(horizon=12, executor='thread'):
+    versions = {dataset: data_store.data_version(dataset) for dataset in ('bulanan', 'harian')}
+
+    frames = {}
+    for dataset in versions:
+        for name, frame in rollups.build(dataset).items():
+            frames[f"rollup_{name}"] = (dataset, frame)
+
+    models = {feature: model_registry.model_version(path) for feature, path in forecasting.FORECAST_MODELS.items()}
+    results = forecasting.forecast_all(data_store.load_bulanan(), executor=executor, horizon=horizon)
+    forecasts = pd.concat([forecasting.result_frame(result) for result in results.values()], ignore_index=True)
+    frames['forecasts'] = ('bulanan', forecasts)
+
+    # Tagged with the versions read before computing: if the data or a model
+    # changes meanwhile, the artifacts no longer match it and are ignored
+    return artifacts.write(frames, versions, horizon=horizon, models=models)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Precompute forecasts and rollups into artifacts/')
+    parser.add_argument('--horizon', type=int, default=12, help='months to forecast')
+    parser.add_argument('--executor', choices=['sequential', 'thread', 'process'], default='thread')
+    parser.add_argument('--every', type=float, metavar='SECONDS',
+                        help='keep running and rebuild on this interval when the data changed')
+    parser.add_argument('--retrain', action='store_true',
+                        help='update the forecast models with new data before each build')
+    args = parser.parse_args()
+
+    built_versions = None
+    while True:
+        versions = {dataset: data_store.data_version(dataset) for dataset in ('bulanan', 'harian')}
+        if versions != built_versions:
+            start = time.perf_counter()
+            if args.retrain:
+                print(retraining.retrain_all()[['feature', 'method']].to_string(index=False))
+            document = build(args.horizon, args.executor)
+            built_versions = versions
+            print(f"{document['generated_at']}: {len(document['artifacts'])} artifacts "
+                  f"in {time.perf_counter() - start:.2f}s")
+        if args.every is None:
+            break
+        time.sleep(args.every)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,108 @@
+# Benchmark: forecast accuracy (rolling-origin MAE/MAPE) and fit/predict time
+# of every category model, on the bundled Data/ files so runs are comparable.
+# Run from the repository root, save a report, and compare later runs with it:
+#
+#     python benchmarks/bench_backtest.py --save backtest.json
+#     python benchmarks/bench_backtest.py --baseline backtest.json
+#
+# With --baseline the exit status is 1 when accuracy or speed regressed.
+
+import argparse
+import json
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import backtesting
+import schema
+import storage
+
+
+def bundled_bulanan():
+    # The Excel file shipped in Data/, whatever backend or journal is active
+    return schema.compact('bulanan', storage.import_file('bulanan', storage.LEGACY_PATHS['bulanan']))
+
+
+def run(args):
+    df = bundled_bulanan()
+    start = time.perf_counter()
+    scores, timings = backtesting.backtest(df, horizon=args.horizon, initial=args.initial,
+                                           executor=args.executor, max_workers=args.workers)
+    wall = time.perf_counter() - start
+
+    summary = scores.groupby('feature', sort=False)[['MAE', 'MAPE']].mean()
+    return {
+        'settings': {'horizon': args.horizon, 'initial': args.initial, 'executor': args.executor,
+                     'workers': args.workers, 'cpus': os.cpu_count()},
+        'wall_seconds': wall,
+        'features': {
+            row['feature']: {
+                'MAE': summary.loc[row['feature'], 'MAE'],
+                'MAPE': summary.loc[row['feature'], 'MAPE'],
+                'fit_mean': row['fit_mean'],
+                'predict_mean': row['predict_mean'],
+            }
+            for row in timings.to_dict('records')
+        },
+        'scores': scores.to_dict('records'),
+    }
+
+
+# Metrics that got worse than the baseline by more than the tolerances
+def regressions(report, baseline, accuracy_tolerance, time_tolerance):
+    found = []
+    for feature, metrics in report['features'].items():
+        before = baseline['features'].get(feature)
+        if before is None:
+            continue
+        for metric, tolerance in (('MAE', accuracy_tolerance), ('MAPE', accuracy_tolerance),
+                                  ('fit_mean', time_tolerance), ('predict_mean', time_tolerance)):
+            if metrics[metric] > before[metric] * (1 + tolerance):
+                found.append(f"{feature} {metric}: {before[metric]:.4g} -> {metrics[metric]:.4g}")
+    if report['wall_seconds'] > baseline['wall_seconds'] * (1 + time_tolerance):
+        found.append(f"wall_seconds: {baseline['wall_seconds']:.2f} -> {report['wall_seconds']:.2f}")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Forecast accuracy and speed benchmark')
+    parser.add_argument('--horizon', type=int, default=6)
+    parser.add_argument('--initial', type=int, default=24)
+    parser.add_argument('--executor', choices=['sequential', 'thread', 'process'], default='process')
+    parser.add_argument('--workers', type=int)
+    parser.add_argument('--save', metavar='FILE', help='write the report as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='report of an earlier run to compare with')
+    parser.add_argument('--accuracy-tolerance', type=float, default=0.02,
+                        help='allowed relative increase of MAE/MAPE')
+    parser.add_argument('--time-tolerance', type=float, default=0.5,
+                        help='allowed relative increase of fit/predict/wall time')
+    args = parser.parse_args()
+
+    report = run(args)
+    print(f"cpus={report['settings']['cpus']} executor={args.executor} wall={report['wall_seconds']:.2f}s")
+    print(f"{'feature':<18} {'MAE':>9} {'MAPE%':>8} {'fit_ms':>8} {'predict_ms':>11}")
+    for feature, metrics in report['features'].items():
+        print(f"{feature:<18} {metrics['MAE']:>9.2f} {metrics['MAPE']:>8.2f} "
+              f"{metrics['fit_mean'] * 1000:>8.1f} {metrics['predict_mean'] * 1000:>11.2f}")
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2, default=float)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        if baseline['settings']['horizon'] != args.horizon or baseline['settings']['initial'] != args.initial:
+            raise SystemExit("Baseline was run with different --horizon/--initial")
+        found = regressions(report, baseline, args.accuracy_tolerance, args.time_tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            raise SystemExit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
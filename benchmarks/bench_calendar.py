@@ -0,0 +1,48 @@
+# Microbenchmark: Tahun/Bulan -> month-start dates, row-wise string join vs
+# the vectorized lookup in kalender. Run from the repository root:
+#
+#     python benchmarks/bench_calendar.py --rows 100000
+
+import argparse
+import os
+import sys
+import timeit
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+import pandas as pd
+
+import kalender
+
+
+# The path forecast() used before kalender
+def string_join(df):
+    return pd.DatetimeIndex(pd.to_datetime(df[['Tahun', 'Bulan']].assign(DAY=1).astype(str).agg('-'.join, axis=1)))
+
+
+def vectorized(df):
+    return kalender.month_starts(df['Tahun'], df['Bulan'])
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Tahun/Bulan date conversion benchmark')
+    parser.add_argument('--rows', type=int, default=100_000)
+    parser.add_argument('--repeat', type=int, default=5)
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(0)
+    df = pd.DataFrame({
+        'Tahun': rng.integers(2000, 2030, args.rows),
+        'Bulan': np.array(kalender.MONTH_NAMES)[rng.integers(0, 12, args.rows)],
+    })
+    if not string_join(df).equals(vectorized(df)):
+        raise SystemExit("Results differ")
+
+    for name, function in (('string_join', string_join), ('vectorized', vectorized)):
+        best = min(timeit.repeat(lambda: function(df), number=1, repeat=args.repeat))
+        print(f"{name:<12} rows={args.rows} best={best * 1000:.2f}ms")
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,64 @@
+# Benchmark: sequential vs concurrent dashboard forecasts.
+#
+# Each round starts cold (models unpickled again, fresh pools), which is what
+# the first dashboard visitor pays. Run from the repository root:
+#
+#     python benchmarks/bench_forecast.py --rounds 3
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import numpy as np
+
+import data_store
+import forecasting
+import model_registry
+
+
+def run_once(df, executor):
+    model_registry.reset()
+    forecasting.shutdown_pools()
+    start = time.perf_counter()
+    results = forecasting.forecast_all(df, executor=executor)
+    return time.perf_counter() - start, results
+
+
+def same_numbers(expected, actual):
+    for feature, result in expected.items():
+        other = actual[feature]
+        for key in ('original', 'in_sample', 'out_sample'):
+            if not np.allclose(result[key].to_numpy(), other[key].to_numpy(), equal_nan=True):
+                return False
+    return True
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Sequential vs concurrent forecast benchmark')
+    parser.add_argument('--rounds', type=int, default=3)
+    args = parser.parse_args()
+
+    df = data_store.load_bulanan()
+    # Warm imports so the first measured mode does not pay for them alone
+    run_once(df, 'sequential')
+
+    baseline = None
+    print(f"cpus={os.cpu_count()} rounds={args.rounds}")
+    for executor in ('sequential', 'thread', 'process'):
+        timings = []
+        for _ in range(args.rounds):
+            elapsed, results = run_once(df, executor)
+            timings.append(elapsed)
+        if baseline is None:
+            baseline, reference = min(timings), results
+        match = same_numbers(reference, results)
+        print(f"{executor:<10} best={min(timings):.3f}s mean={np.mean(timings):.3f}s "
+              f"speedup={baseline / min(timings):.2f}x same_numbers={match}")
+    forecasting.shutdown_pools()
+
+
+if __name__ == '__main__':
+    main()
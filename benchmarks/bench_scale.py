@@ -0,0 +1,48 @@
+# Benchmark: the daily-data paths of the dashboard on a synthetic dataset many
+# times the size of Data/ (see fixtures.py). Run from the repository root:
+#
+#     python benchmarks/bench_scale.py --rows 1000000
+
+import argparse
+import os
+import sys
+import time
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import pandas as pd
+
+import charts
+import data_store
+import schema
+import storage
+from fixtures import scale_fixture
+
+
+def timed(label, function):
+    start = time.perf_counter()
+    result = function()
+    print(f"{label:<28} {time.perf_counter() - start:8.3f}s")
+    return result
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Daily dataset paths at scale')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='records per location')
+    parser.add_argument('--method', choices=['bootstrap', 'gan'], default='bootstrap')
+    args = parser.parse_args()
+
+    path = timed('fixture', lambda: scale_fixture(args.rows, args.method))
+    raw = timed('read parquet', lambda: pd.read_parquet(path))
+    df = timed('compact schema', lambda: schema.compact('harian', raw))
+    print(f"{len(df)} rows, {schema.memory_bytes(raw) / 2**20:.1f} MiB -> {schema.memory_bytes(df) / 2**20:.1f} MiB")
+
+    location = df['Lokasi'].iloc[0]
+    filtered = timed('filter one location', lambda: data_store.filter_frame(df, {'Lokasi': [location]}))
+    timed('location totals', lambda: df.groupby('Lokasi', observed=True)[storage.MEASURES].sum())
+    daily = timed('daily series', lambda: filtered.set_index('Tanggal')['Sampah Daun'].resample('D').sum())
+    timed('downsampled trace', lambda: charts.scatter(daily.index, daily.to_numpy()))
+
+
+if __name__ == '__main__':
+    main()
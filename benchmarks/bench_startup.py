@@ -0,0 +1,160 @@
+# Benchmark: cold start of the dashboard. Every measurement runs in a fresh
+# Python process: the time to import app.py, which heavy libraries that
+# import pulled in, and the first paint of each page (first script run,
+# imports included), cold and after warmup.py finished. Run from the
+# repository root, save a report, and compare later runs with it:
+#
+#     python benchmarks/bench_startup.py --save startup.json
+#     python benchmarks/bench_startup.py --baseline startup.json
+#
+# With --baseline the exit status is 1 when a timing regressed.
+
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# Libraries that should only be imported by the pages that need them
+HEAVY_MODULES = ['pmdarima', 'statsmodels', 'scipy', 'sklearn', 'openpyxl', 'plotly.validators.scatter']
+
+PAGES = ['Dashboard', 'Input Data']
+
+SCRIPT = f"""
+import sys
+sys.path.insert(0, {ROOT!r})
+import app
+app.main()
+"""
+
+
+def measure_import():
+    start = time.perf_counter()
+    import app  # noqa: F401
+    seconds = time.perf_counter() - start
+    return {'seconds': seconds, 'modules': [name for name in HEAVY_MODULES if name in sys.modules]}
+
+
+def measure_page(page, warm):
+    from streamlit.testing.v1 import AppTest
+
+    result = {}
+    if warm:
+        import warmup
+
+        start = time.perf_counter()
+        warmup.start()
+        warmup.wait()
+        result['warmup_seconds'] = time.perf_counter() - start
+        result['warmup_error'] = warmup.status()['error']
+
+    with tempfile.NamedTemporaryFile('w', suffix='.py', delete=False) as file:
+        file.write(SCRIPT)
+    try:
+        at = AppTest.from_file(file.name, default_timeout=300)
+        at.session_state['operation'] = page
+        start = time.perf_counter()
+        at.run()
+        result['seconds'] = time.perf_counter() - start
+        result['exceptions'] = [str(exception.value) for exception in at.exception]
+    finally:
+        os.remove(file.name)
+    result['modules'] = [name for name in HEAVY_MODULES if name in sys.modules]
+    return result
+
+
+def child(args):
+    sys.path.insert(0, ROOT)
+    os.chdir(ROOT)
+    if args.child == 'import':
+        result = measure_import()
+    else:
+        result = measure_page(args.page, warm=args.child == 'warm')
+    print(json.dumps(result))
+
+
+def spawn(*child_args):
+    output = subprocess.run(
+        [sys.executable, os.path.abspath(__file__), '--child', *child_args],
+        check=True, capture_output=True, text=True, cwd=ROOT,
+    ).stdout
+    return json.loads(output.strip().splitlines()[-1])
+
+
+# Median of `repeat` fresh processes; the other fields come from the last one
+def median_run(repeat, *child_args):
+    runs = [spawn(*child_args) for _ in range(repeat)]
+    result = dict(runs[-1])
+    result['seconds'] = statistics.median(run['seconds'] for run in runs)
+    if 'warmup_seconds' in result:
+        result['warmup_seconds'] = statistics.median(run['warmup_seconds'] for run in runs)
+    return result
+
+
+def run(args):
+    timings = {'import app': median_run(args.repeat, 'import')}
+    for page in PAGES:
+        timings[f"first paint {page}"] = median_run(args.repeat, 'page', '--page', page)
+    timings['first paint Dashboard (warm)'] = median_run(args.repeat, 'warm', '--page', 'Dashboard')
+    return {
+        'settings': {'repeat': args.repeat, 'cpus': os.cpu_count(), 'python': sys.version.split()[0]},
+        'timings': timings,
+    }
+
+
+# Timings that got slower than the baseline by more than the tolerance
+def regressions(report, baseline, tolerance):
+    found = []
+    for name, timing in report['timings'].items():
+        before = baseline['timings'].get(name)
+        if before is not None and timing['seconds'] > before['seconds'] * (1 + tolerance):
+            found.append(f"{name}: {before['seconds']:.2f}s -> {timing['seconds']:.2f}s")
+    return found
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Dashboard cold start benchmark')
+    parser.add_argument('--repeat', type=int, default=3, help='fresh processes per measurement')
+    parser.add_argument('--save', metavar='FILE', help='write the report as JSON')
+    parser.add_argument('--baseline', metavar='FILE', help='report of an earlier run to compare with')
+    parser.add_argument('--tolerance', type=float, default=0.25, help='allowed relative slowdown')
+    parser.add_argument('--child', choices=['import', 'page', 'warm'], help=argparse.SUPPRESS)
+    parser.add_argument('--page', choices=PAGES, default='Dashboard', help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.child:
+        child(args)
+        return
+
+    report = run(args)
+    print(f"cpus={report['settings']['cpus']} repeat={args.repeat}")
+    print(f"{'measurement':<30} {'seconds':>8}  heavy modules loaded")
+    for name, timing in report['timings'].items():
+        print(f"{name:<30} {timing['seconds']:>8.2f}  {', '.join(timing['modules']) or '-'}")
+        if timing.get('exceptions'):
+            print(f"  exceptions: {timing['exceptions']}")
+    warm = report['timings']['first paint Dashboard (warm)']
+    print(f"warm-up took {warm['warmup_seconds']:.2f}s" + (f" ({warm['warmup_error']})" if warm['warmup_error'] else ''))
+
+    if args.save:
+        with open(args.save, 'w', encoding='utf-8') as file:
+            json.dump(report, file, indent=2)
+
+    if args.baseline:
+        with open(args.baseline, encoding='utf-8') as file:
+            baseline = json.load(file)
+        found = regressions(report, baseline, args.tolerance)
+        for line in found:
+            print(f"REGRESSION {line}")
+        if found:
+            raise SystemExit(1)
+        print("no regressions against baseline")
+
+
+if __name__ == '__main__':
+    main()
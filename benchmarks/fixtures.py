@@ -0,0 +1,19 @@
+# Scale fixtures for the benchmarks: synthetic daily records (synthetic.py),
+# generated once per size and reused from the temp directory afterwards.
+
+import os
+import sys
+import tempfile
+
+sys.path.insert(0, os.path.dirname(os.path.dirname(os.path.abspath(__file__))))
+
+import synthetic
+
+
+def scale_fixture(rows_per_location, method='bootstrap', seed=0, suffix='.parquet'):
+    path = os.path.join(tempfile.gettempdir(), f"smartwaste-harian-{method}-{rows_per_location}-{seed}{suffix}")
+    if not os.path.exists(path):
+        tmp_path = path + '.tmp' + suffix
+        synthetic.write(tmp_path, synthetic.generate(rows_per_location, method=method, seed=seed))
+        os.replace(tmp_path, path)
+    return path
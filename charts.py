@@ -0,0 +1,259 @@
+import threading
+from collections import OrderedDict
+
+import numpy as np
+import pandas as pd
+import plotly.graph_objects as go
+from plotly.subplots import make_subplots
+
+import data_store
+import kalender
+import profiler
+
+
+# Series longer than this are downsampled (LTTB) to this many points
+MAX_POINTS = 2000
+# Series longer than this are drawn with WebGL (Scattergl) instead of SVG
+WEBGL_THRESHOLD = 1000
+# Number of built figures kept across reruns and sessions
+CACHE_SIZE = 128
+
+# (chart, filters, data version) -> go.Figure, least recently used first
+_figures = OrderedDict()
+_lock = threading.Lock()
+
+
+# Function to pick n_out points of a series with Largest-Triangle-Three-Buckets,
+# returning their positions. First and last points are always kept.
+def lttb(x, y, n_out):
+    n = len(y)
+    if n_out >= n or n_out < 3:
+        return np.arange(n)
+
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    edges = np.linspace(1, n - 1, n_out - 1).astype(np.int64)
+
+    keep = np.empty(n_out, dtype=np.int64)
+    keep[0], keep[-1] = 0, n - 1
+    selected = 0
+    for bucket in range(n_out - 2):
+        start, end = edges[bucket], edges[bucket + 1]
+        # Average of the next bucket, or the last point for the final bucket
+        if bucket + 2 < len(edges):
+            next_start, next_end = edges[bucket + 1], edges[bucket + 2]
+            avg_x, avg_y = x[next_start:next_end].mean(), y[next_start:next_end].mean()
+        else:
+            avg_x, avg_y = x[-1], y[-1]
+        area = np.abs(
+            (x[selected] - avg_x) * (y[start:end] - y[selected])
+            - (x[selected] - x[start:end]) * (avg_y - y[selected])
+        )
+        selected = start + int(np.argmax(area))
+        keep[bucket + 1] = selected
+    return keep
+
+
+def _numeric_x(x):
+    if np.issubdtype(x.dtype, np.datetime64):
+        return x.astype('datetime64[ns]').astype(np.int64)
+    if np.issubdtype(x.dtype, np.number):
+        return x
+    return np.arange(len(x))
+
+
+# Function to build a line trace, downsampled and switched to WebGL for long
+# series. Data is passed as NumPy arrays, which plotly serializes compactly.
+def scatter(x, y, **kwargs):
+    x = np.asarray(x)
+    y = np.asarray(y, dtype=np.float64)
+    long_series = len(y) > WEBGL_THRESHOLD
+    if len(y) > MAX_POINTS:
+        finite = np.isfinite(y)
+        x, y = x[finite], y[finite]
+        keep = lttb(_numeric_x(x), y, MAX_POINTS)
+        x, y = x[keep], y[keep]
+    trace = go.Scattergl if long_series else go.Scatter
+    return trace(x=x, y=y, **kwargs)
+
+
+def get_figure(chart, filters, data_version):
+    key = (chart, data_store.filter_signature(filters), data_version)
+    with _lock:
+        fig = _figures.get(key)
+        if fig is not None:
+            _figures.move_to_end(key)
+    return fig
+
+
+def put_figure(chart, filters, data_version, fig):
+    key = (chart, data_store.filter_signature(filters), data_version)
+    with _lock:
+        _figures[key] = fig
+        _figures.move_to_end(key)
+        while len(_figures) > CACHE_SIZE:
+            _figures.popitem(last=False)
+    return fig
+
+
+# Function to get a figure from the cache, building it only on a miss
+def cached_figure(chart, filters, data_version, build):
+    fig = get_figure(chart, filters, data_version)
+    profiler.count('charts.miss' if fig is None else 'charts.hit')
+    if fig is None:
+        with profiler.stage('charts.build'):
+            fig = put_figure(chart, filters, data_version, build())
+    return fig
+
+
+def clear():
+    with _lock:
+        _figures.clear()
+
+
+# Perbandingan kategori sampah per tahun, dari rollups.yearly
+def yearly_figure(grouped_data):
+    # Buat plot dengan menggunakan Plotly
+    fig = go.Figure()
+
+    # Tambahkan trace untuk masing-masing kategori sampah dengan jenis bar
+    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Sampah Daun"], name='Sampah Daun', marker_color='#1f77b4'))  # blue
+    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Sampah Sayuran"], name='Sampah Sayuran', marker_color='#ff7f0e'))  # orange
+    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Sampah Fermentasi"], name='Sampah Fermentasi', marker_color='#2ca02c'))  # green
+    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Daun Terolah"], name='Daun Terolah', marker_color='#9467bd'))  # purple
+    fig.add_trace(go.Bar(x=grouped_data["Tahun"], y=grouped_data["Kompos Jadi"], name='Kompos Jadi', marker_color='#17becf'))  # cyan
+
+    # Update layout
+    fig.update_layout(
+        title='Perbandingan Sampah Daun, Sampah Sayuran, Sampah Fermentasi, Daun Terolah, dan Kompos Jadi per Tahun',
+        xaxis_title='Tahun',
+        yaxis_title='Jumlah Sampah',
+        barmode='group',  # Mengelompokkan bar untuk setiap tahun
+        legend_title='Kategori Sampah',
+        font=dict(size=12, color='black'),  # Ukuran dan warna font
+    )
+    return fig
+
+
+# Perbandingan kategori sampah per bulan, dari rollups.monthly
+def monthly_figure(df):
+    # Convert 'Tahun' and 'Bulan' columns to a single datetime column
+    df['Date'] = kalender.month_starts(df['Tahun'], df['Bulan'])
+    df = df.sort_values('Date')
+
+    # Plotting with Plotly
+    fig = go.Figure()
+
+    # Add traces for each type of waste
+    fig.add_trace(scatter(df['Date'], df['Sampah Daun'], mode='lines+markers', name='Sampah Daun'))
+    fig.add_trace(scatter(df['Date'], df['Sampah Sayuran'], mode='lines+markers', name='Sampah Sayuran'))
+    fig.add_trace(scatter(df['Date'], df['Sampah Anorganik'], mode='lines+markers', name='Sampah Anorganik'))
+    fig.add_trace(scatter(df['Date'], df['Daun Terolah'], mode='lines+markers', name='Daun Terolah'))
+    fig.add_trace(scatter(df['Date'], df['Sampah Fermentasi'], mode='lines+markers', name='Sampah Fermentasi'))
+    fig.add_trace(scatter(df['Date'], df['Kompos Jadi'], mode='lines+markers', name='Kompos Jadi'))
+
+    # Update layout
+    fig.update_layout(
+        title='Perbandingan Sampah per Bulan',
+        xaxis_title='Date',
+        yaxis_title='Jumlah Sampah',
+        legend=dict(x=0, y=1),
+        xaxis=dict(showgrid=True),
+        yaxis=dict(showgrid=True)
+    )
+    return fig
+
+
+# Function to build the forecast figure from a forecasting.compute_forecast result
+def forecast_figure(result):
+    feature = result['feature']
+    ts_data = result['original']
+    forecast_in_sample = result['in_sample']
+    forecast_out_sample = result['out_sample']
+    out_sample_index = forecast_out_sample.index
+
+    # Plotting with Plotly
+    fig = make_subplots()
+
+    # Original time series data
+    fig.add_trace(scatter(
+        ts_data.index,
+        ts_data,
+        mode='lines+markers',
+        name='Original',
+        line=dict(color='blue'),
+        marker=dict(symbol='circle')
+    ))
+
+    # In-sample forecast
+    fig.add_trace(scatter(
+        forecast_in_sample.index,
+        forecast_in_sample,
+        mode='lines+markers',
+        name='Forecast (In-sample)',
+        line=dict(color='green'),
+        marker=dict(symbol='circle')
+    ))
+
+    # Out-of-sample forecast
+    fig.add_trace(scatter(
+        out_sample_index,
+        forecast_out_sample,
+        mode='lines+markers',
+        name='Forecast (Out-sample)',
+        line=dict(color='green'),
+        marker=dict(symbol='circle')
+    ))
+
+    # Adding a connection between the last in-sample point and the first out-sample point
+    fig.add_trace(go.Scatter(
+        x=[forecast_in_sample.index[-1], out_sample_index[0]],
+        y=[forecast_in_sample.iloc[-1], forecast_out_sample.iloc[0]],
+        mode='lines+markers',
+        line=dict(color='green'),
+        marker=dict(symbol='circle'),
+        showlegend=False
+    ))
+
+    # Update layout
+    fig.update_layout(
+        title=f'Time Series {feature} Forecast',
+        xaxis_title='Date',
+        yaxis_title='Value',
+        legend=dict(x=0, y=1),
+        xaxis=dict(showgrid=True),
+        yaxis=dict(showgrid=True)
+    )
+    return fig
+
+
+# Komposisi sampah di satu lokasi, dari rollups.location_totals
+def pie_figure(totals, location):
+    # Sum up waste categories
+    if location in totals.index:
+        location_totals = totals.loc[location]
+    else:
+        location_totals = pd.Series(0, index=totals.columns)
+    total_sampah_daun = location_totals['Sampah Daun']
+    total_sampah_sayuran = location_totals['Sampah Sayuran']
+    total_sampah_fermentasi = location_totals['Sampah Fermentasi']
+    total_daun_terolah = location_totals['Daun Terolah']
+    total_kompos_jadi = location_totals['Kompos Jadi']
+
+    # Create pie chart
+    fig = go.Figure()
+
+    # Add trace for each waste category
+    fig.add_trace(go.Pie(labels=['Sampah Daun', 'Sampah Sayuran', 'Sampah Fermentasi', 'Daun Terolah', 'Kompos Jadi'],
+                         values=[total_sampah_daun, total_sampah_sayuran, total_sampah_fermentasi, total_daun_terolah, total_kompos_jadi],
+                         hole=0.3,
+                         marker=dict(line=dict(color='#000000', width=1))
+                         ))
+
+    # Update layout
+    fig.update_layout(
+        title=f'Komposisi Sampah di Lokasi {location}',
+        legend_title='Kategori Sampah',
+        uniformtext_minsize=12, uniformtext_mode='hide'
+    )
+    return fig
@@ -0,0 +1,214 @@
+import datetime
+import threading
+
+import numpy as np
+import pandas as pd
+
+import journal
+import profiler
+import schema
+import shared_cache
+import storage
+
+
+# Process-wide cache: dataset -> (version, DataFrame)
+_cache = {}
+# dataset -> (bytes as read, bytes after schema.compact)
+_memory = {}
+_lock = threading.Lock()
+# Callbacks notified of every record written through this module
+_write_listeners = []
+
+
+# Return the cached dataset, re-reading it only when its base file or journal
+# changed. The columns are shared read-only, so an in-place edit raises instead
+# of leaking into the cache; records change through add/update/delete_record.
+def load(dataset):
+    version = journal.signature(dataset)
+    with _lock:
+        entry = _cache.get(dataset)
+        profiler.count('data_store.miss' if entry is None or entry[0] != version else 'data_store.hit')
+        if entry is None or entry[0] != version:
+            with profiler.stage(f'data_store.load {dataset}'):
+                # Parsed by another process already, when a shared tier is configured
+                compacted = shared_cache.get_frame('dataset', dataset, version)
+                if compacted is None:
+                    df = journal.snapshot(dataset)
+                    compacted = schema.compact(dataset, df)
+                    shared_cache.put_frame('dataset', dataset, version, compacted)
+                    compacted = shared_cache.read_only(compacted)
+                    _memory[dataset] = (schema.memory_bytes(df), schema.memory_bytes(compacted))
+            entry = (version, compacted)
+            _cache[dataset] = entry
+    # A new frame object, so columns added by the caller stay its own
+    return entry[1].copy(deep=False)
+
+
+# Memory of each loaded dataset before and after the compact schema
+def memory_report():
+    with _lock:
+        rows = [
+            {'dataset': dataset, 'rows': len(_cache[dataset][1]) if dataset in _cache else None,
+             'bytes_before': before, 'bytes_after': after}
+            for dataset, (before, after) in _memory.items()
+        ]
+    return pd.DataFrame(rows, columns=['dataset', 'rows', 'bytes_before', 'bytes_after'])
+
+
+# Drop the cached copy of a changed dataset here and in every other process
+# sharing the cache tier
+def _changed(dataset):
+    invalidate(dataset)
+    shared_cache.publish(dataset, list(data_version(dataset)))
+
+
+# Replace a whole dataset through the active backend and drop its cached copy
+def save(dataset, df):
+    journal.replace(dataset, df)
+    _changed(dataset)
+
+
+# Append rows in bulk (see journal.append), returning how many were added
+def append(dataset, make_chunks):
+    rows, _, _ = journal.append(dataset, make_chunks)
+    _changed(dataset)
+    return rows
+
+
+# Register callback(dataset, old_row, new_row, before, after), called after
+# each record write. Rows are dicts (None for add/delete), versions are the
+# dataset versions right before and after the change.
+def on_write(callback):
+    _write_listeners.append(callback)
+    return callback
+
+
+def _cached_row(dataset, record_id, version):
+    with _lock:
+        entry = _cache.get(dataset)
+    if entry is None or entry[0] != version or record_id not in entry[1].index:
+        return None
+    return entry[1].loc[record_id].to_dict()
+
+
+def _written(dataset, change, *args):
+    version = data_version(dataset)
+    entry, before, after = change(dataset, *args)
+    # The old row is only known when the cache held exactly the version we changed
+    old_row = _cached_row(dataset, entry['id'], before) if before == version else None
+    if entry['op'] != 'add' and old_row is None:
+        before = None
+    new_row = entry.get('record')
+    _changed(dataset)
+    for callback in _write_listeners:
+        callback(dataset, old_row, new_row, before, after)
+    return entry['id']
+
+
+# Function to add a record, returning its ID
+def add_record(dataset, record):
+    return _written(dataset, journal.add, record)
+
+
+def update_record(dataset, record_id, record):
+    return _written(dataset, journal.update, record_id, record)
+
+
+def delete_record(dataset, record_id):
+    return _written(dataset, journal.delete, record_id)
+
+
+def load_bulanan():
+    return load('bulanan')
+
+
+def load_harian():
+    return load('harian')
+
+
+# Version of a dataset as seen by the cache, usable as a key for derived results
+def data_version(dataset='bulanan'):
+    return journal.signature(dataset)
+
+
+# Backend that can answer a query directly, or None to use the cached frame
+def query_backend(dataset):
+    backend = storage.get_backend()
+    if hasattr(backend, 'query') and not journal.pending(dataset):
+        return backend
+    return None
+
+
+# Function to filter a frame by {column: values} (isin) and {column: date} (whole day)
+def filter_frame(df, filters):
+    mask = pd.Series(True, index=df.index)
+    for column, value in filters.items():
+        if isinstance(value, datetime.date):
+            start = pd.Timestamp(value)
+            mask &= (df[column] >= start) & (df[column] < start + pd.Timedelta(days=1))
+        else:
+            mask &= df[column].isin(value)
+    return df[mask]
+
+
+# Filters without the empty selections, which mean "no filter"
+def active_filters(filters):
+    return {column: value for column, value in filters.items() if value}
+
+
+# Hashable key of a filter selection, usable with data_version() to cache
+# results derived from it without hashing the filtered frame
+def filter_signature(filters):
+    items = []
+    for column, value in sorted(filters.items()):
+        if isinstance(value, (list, tuple, set, np.ndarray, pd.Index)):
+            value = tuple(value)
+        # Empty selections mean "no filter", like active_filters
+        if value is None or value == ():
+            continue
+        items.append((column, value))
+    return tuple(items)
+
+
+# Rows of a dataset matching filters; empty selections are ignored. Pushed
+# down to the backend (SQL) when it supports queries.
+def query(dataset, filters):
+    filters = active_filters(filters)
+    backend = query_backend(dataset)
+    if backend is not None:
+        return backend.query(dataset, filters)
+    return filter_frame(load(dataset), filters)
+
+
+# Distinct values of a column, in order of first appearance
+def distinct(dataset, column):
+    backend = query_backend(dataset)
+    if backend is not None:
+        return backend.distinct(dataset, column)
+    return load(dataset)[column].unique()
+
+
+# (min, max) of a column, or (None, None) for an empty dataset
+def value_range(dataset, column):
+    backend = query_backend(dataset)
+    if backend is not None:
+        return backend.value_range(dataset, column)
+    values = load(dataset)[column]
+    if values.empty:
+        return None, None
+    return values.min(), values.max()
+
+
+# Drop cached frames so the next load re-reads from storage
+def invalidate(dataset=None):
+    with _lock:
+        if dataset is None:
+            _cache.clear()
+        else:
+            _cache.pop(dataset, None)
+
+
+# Changes published by other processes
+@shared_cache.subscribe
+def _changed_elsewhere(dataset, version):
+    invalidate(dataset)
@@ -0,0 +1,163 @@
+import io
+import threading
+from collections import OrderedDict
+
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import data_store
+import profiler
+
+
+# Downloads of filtered datasets as CSV, Parquet or Excel. Files are written
+# chunk by chunk, so the whole frame is never rendered as one string, and the
+# bytes are cached by (filter signature, data version): the filtered frame
+# itself is never hashed.
+
+# format -> (file extension, MIME type)
+FORMATS = {
+    'csv': ('.csv', 'text/csv'),
+    'parquet': ('.parquet', 'application/vnd.apache.parquet'),
+    'xlsx': ('.xlsx', 'application/vnd.openxmlformats-officedocument.spreadsheetml.sheet'),
+}
+# Rows rendered at a time
+CHUNK_ROWS = 50_000
+# Total size of the exported files kept across reruns and sessions
+CACHE_BYTES = 64 * 1024 * 1024
+
+# (dataset, format, filter signature, data version) -> bytes, least recently used first
+_files = OrderedDict()
+_size = 0
+_lock = threading.Lock()
+
+
+def _chunks(df, chunk_rows):
+    for start in range(0, len(df), chunk_rows):
+        yield df.iloc[start:start + chunk_rows]
+
+
+# pandas drops the time of day when all datetimes of a frame are midnight;
+# the format is chosen over the whole frame so every chunk writes the same
+def _date_format(df):
+    columns = df.select_dtypes('datetime').columns
+    if columns.empty:
+        return None
+    # Nanoseconds past midnight / past the second, over every datetime column
+    times = [df[column].dropna().to_numpy('datetime64[ns]').view('int64') % 86_400_000_000_000 for column in columns]
+    if any((values % 1_000_000_000).any() for values in times):
+        return '%Y-%m-%d %H:%M:%S.%f'
+    if any(values.any() for values in times):
+        return '%Y-%m-%d %H:%M:%S'
+    return '%Y-%m-%d'
+
+
+def _csv(df, chunk_rows):
+    date_format = _date_format(df)
+    # The record index is kept as the first column, as in the original download
+    for number, chunk in enumerate(_chunks(df, chunk_rows)):
+        yield chunk.to_csv(header=number == 0, date_format=date_format).encode('utf-8')
+    if df.empty:
+        yield df.to_csv().encode('utf-8')
+
+
+def _parquet(df, chunk_rows):
+    sink = pa.BufferOutputStream()
+    # Types are inferred from the first chunk: without rows, object columns
+    # (e.g. strings read from SQLite) would get the null type
+    schema = pa.Schema.from_pandas(df.iloc[:chunk_rows])
+    with pq.ParquetWriter(sink, schema) as writer:
+        for chunk in _chunks(df, chunk_rows):
+            writer.write_table(pa.Table.from_pandas(chunk, schema=schema))
+    yield sink.getvalue().to_pybytes()
+
+
+def _xlsx(df, chunk_rows):
+    import openpyxl
+
+    # Write-only mode streams the rows to the sheet instead of keeping cells
+    workbook = openpyxl.Workbook(write_only=True)
+    sheet = workbook.create_sheet()
+    sheet.append([df.index.name or ''] + [str(column) for column in df.columns])
+    for chunk in _chunks(df, chunk_rows):
+        # Plain Python values: categories as strings, NumPy integers as int
+        for row in chunk.astype(object).itertuples(name=None):
+            sheet.append(row)
+    output = io.BytesIO()
+    workbook.save(output)
+    yield output.getvalue()
+
+
+WRITERS = {'csv': _csv, 'parquet': _parquet, 'xlsx': _xlsx}
+
+
+# Function to render a frame as a file, yielding it in pieces of bytes. CSV is
+# yielded one chunk of rows at a time; Parquet and Excel are written chunk by
+# chunk but yielded whole, since their footers come last.
+def stream(df, fmt='csv', chunk_rows=CHUNK_ROWS):
+    if fmt not in WRITERS:
+        raise ValueError(f"Unsupported export format: {fmt}")
+    return WRITERS[fmt](df, chunk_rows)
+
+
+def _key(dataset, filters, fmt):
+    return (dataset, fmt, data_store.filter_signature(filters), data_store.data_version(dataset))
+
+
+def _get(key):
+    with _lock:
+        data = _files.get(key)
+        if data is not None:
+            _files.move_to_end(key)
+    return data
+
+
+# Function to get a cached export, or None when it has to be rendered
+def cached(dataset, filters, fmt='csv'):
+    return _get(_key(dataset, filters, fmt))
+
+
+def _put(key, data):
+    global _size
+    # A file larger than the whole cache is served but not kept
+    if len(data) > CACHE_BYTES:
+        return data
+    with _lock:
+        if key in _files:
+            _size -= len(_files.pop(key))
+        _files[key] = data
+        _size += len(data)
+        while _size > CACHE_BYTES:
+            _size -= len(_files.popitem(last=False)[1])
+    return data
+
+
+# Function to get the exported file of a filtered dataset, rendering it only
+# on a miss. df is the already filtered frame, when the caller has it.
+def export(dataset, filters, fmt='csv', df=None):
+    key = _key(dataset, filters, fmt)
+    data = _get(key)
+    profiler.count('exports.miss' if data is None else 'exports.hit')
+    if data is None:
+        with profiler.stage(f'exports.{fmt}'):
+            if df is None:
+                df = data_store.query(dataset, filters)
+            # Pieces are appended as they come, so at most one chunk is
+            # held besides the file
+            output = io.BytesIO()
+            for piece in stream(df, fmt):
+                output.write(piece)
+            data = _put(key, output.getvalue())
+    return data
+
+
+# Function to drop every cached file
+def clear():
+    global _size
+    with _lock:
+        _files.clear()
+        _size = 0
+
+
+def cache_info():
+    with _lock:
+        return {'files': len(_files), 'bytes': _size, 'max_bytes': CACHE_BYTES}
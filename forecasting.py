@@ -0,0 +1,128 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import kalender
+import model_registry
+
+
+# Kategori sampah yang diramalkan beserta file modelnya, dalam urutan tampilan
+FORECAST_MODELS = {
+    'Sampah Daun': 'Model/model_sampahDaun.pkl',
+    'Sampah Sayuran': 'Model/model_sampahSayuran.pkl',
+    'Daun Terolah': 'Model/model_daunTerolah.pkl',
+    'Sampah Fermentasi': 'Model/model_sampahFermentasi.pkl',
+    'Kompos Jadi': 'Model/model_komposJadi.pkl',
+}
+
+# Long-lived pools, so process workers keep their loaded models between reruns
+_pools = {}
+_pools_lock = threading.Lock()
+
+
+# Function to compute the forecast series for one waste category
+def compute_forecast(df, model, feature, data_version=None, horizon=12):
+    df = df.copy()
+    df['Date'] = kalender.month_starts(df['Tahun'], df['Bulan'])
+    df.set_index('Date', inplace=True)
+    ts_data = df[feature].dropna()
+
+    if data_version is None:
+        data_version = data_store.data_version()
+    in_sample, out_sample = model_registry.predict(model, data_version, horizon=horizon)
+
+    # In-sample forecast aligned on the dataset dates. A model that was not
+    # retrained since rows were added covers only the months it was fitted on.
+    in_sample = np.asarray(in_sample)[:len(ts_data)]
+    fitted = np.full(len(df), np.nan)
+    fitted[np.flatnonzero(df[feature].notna())[:len(in_sample)]] = in_sample
+    df['forecast_in_sample'] = fitted
+
+    # Create the index for the out-sample forecast, which continues from the
+    # last month the model has seen
+    out_sample_index = pd.date_range(start=ts_data.index[len(in_sample) - 1], periods=horizon + 1, freq='M')[1:]
+
+    return {
+        'feature': feature,
+        'original': ts_data,
+        'in_sample': df['forecast_in_sample'],
+        'out_sample': pd.Series(np.asarray(out_sample), index=out_sample_index),
+    }
+
+
+# Function to flatten a compute_forecast result into a long DataFrame with
+# columns feature, series ('original', 'in_sample', 'out_sample'), Date, value
+def result_frame(result):
+    parts = [
+        pd.DataFrame({
+            'feature': result['feature'],
+            'series': series,
+            'Date': result[series].index,
+            'value': result[series].to_numpy(dtype=np.float64),
+        })
+        for series in ('original', 'in_sample', 'out_sample')
+    ]
+    return pd.concat(parts, ignore_index=True)
+
+
+# Inverse of result_frame for a single feature
+def frame_result(frame):
+    result = {'feature': frame['feature'].iloc[0]}
+    for series in ('original', 'in_sample', 'out_sample'):
+        rows = frame[frame['series'] == series]
+        result[series] = pd.Series(rows['value'].to_numpy(), index=pd.DatetimeIndex(rows['Date']), name=series)
+    return result
+
+
+def _pool(executor, max_workers):
+    key = (executor, max_workers)
+    with _pools_lock:
+        pool = _pools.get(key)
+        if pool is None:
+            if executor == 'process':
+                pool = ProcessPoolExecutor(max_workers=max_workers)
+            elif executor == 'thread':
+                pool = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix='forecast')
+            else:
+                raise ValueError(f"Unknown executor: {executor}")
+            _pools[key] = pool
+    return pool
+
+
+# Yield forecasts for every category. With a pool they run concurrently and,
+# unless ordered=True, are yielded as soon as each one is ready.
+def iter_forecasts(df, models=None, executor='thread', max_workers=None, ordered=False, horizon=12):
+    models = FORECAST_MODELS if models is None else models
+    data_version = data_store.data_version()
+
+    if executor == 'sequential':
+        for feature, model in models.items():
+            yield compute_forecast(df, model, feature, data_version, horizon)
+        return
+
+    pool = _pool(executor, max_workers or len(models))
+    futures = [
+        pool.submit(compute_forecast, df, model, feature, data_version, horizon)
+        for feature, model in models.items()
+    ]
+    for future in (futures if ordered else as_completed(futures)):
+        yield future.result()
+
+
+# Compute every forecast and return them keyed by category, in display order
+def forecast_all(df, models=None, executor='thread', max_workers=None, horizon=12):
+    return {
+        result['feature']: result
+        for result in iter_forecasts(df, models, executor, max_workers, ordered=True, horizon=horizon)
+    }
+
+
+def shutdown_pools():
+    with _pools_lock:
+        pools = list(_pools.values())
+        _pools.clear()
+    for pool in pools:
+        pool.shutdown()
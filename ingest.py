@@ -0,0 +1,149 @@
+import argparse
+import itertools
+import os
+import time
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import storage
+
+
+# Bulk import of daily compost house logs (CSV/XLSX) into the 'harian' dataset
+
+# Rows read, validated and appended at a time
+CHUNK_ROWS = 50_000
+# Largest accepted value of a waste category in one record, in kg
+MAX_KILOGRAMS = 100_000
+# Rejected rows kept for the report
+MAX_REJECTS = 1000
+
+KEY = ['Tanggal', 'Lokasi']
+
+
+def _extension(source, name):
+    name = name or getattr(source, 'name', None) or source
+    return os.path.splitext(str(name))[1].lower()
+
+
+# Function to read a CSV/XLSX file (path or file object) in chunks of rows
+def read_chunks(source, name=None, chunk_rows=CHUNK_ROWS):
+    extension = _extension(source, name)
+    if extension == '.csv':
+        yield from pd.read_csv(source, chunksize=chunk_rows)
+    elif extension == '.xlsx':
+        import openpyxl
+
+        # Read-only mode streams the sheet instead of loading the workbook
+        workbook = openpyxl.load_workbook(source, read_only=True, data_only=True)
+        try:
+            rows = workbook.active.iter_rows(values_only=True)
+            header = next(rows, None)
+            while header is not None:
+                batch = list(itertools.islice(rows, chunk_rows))
+                if not batch:
+                    break
+                yield pd.DataFrame(batch, columns=header)
+        finally:
+            workbook.close()
+    else:
+        raise ValueError(f"Unsupported file type: {name or source}")
+
+
+# Function to validate and normalize one chunk as read from a log file.
+# Returns (rows in the 'harian' schema, rejected rows with a 'reason' column).
+def normalize_chunk(df):
+    df = df.rename(columns={'Kompos': 'Lokasi'})
+    missing = [column for column in KEY + storage.MEASURES if column not in df.columns]
+    if missing:
+        raise ValueError(f"Missing column(s): {', '.join(missing)}")
+
+    # Each value parsed on its own: dates with or without a time of day
+    tanggal = pd.to_datetime(df['Tanggal'], format='ISO8601', errors='coerce')
+    lokasi = df['Lokasi'].astype('string').str.strip().replace(storage.LOKASI_NAMES)
+    values = df[storage.MEASURES].apply(pd.to_numeric, errors='coerce')
+
+    # First failing check of each row, in this order
+    reason = pd.Series(pd.NA, index=df.index, dtype='string')
+    checks = [
+        ('invalid Tanggal', tanggal.isna()),
+        ('missing Lokasi', lokasi.isna() | (lokasi == '')),
+        ('invalid number', values.isna().any(axis=1)),
+        ('out of range', ((values < 0) | (values > MAX_KILOGRAMS)).any(axis=1)),
+        ('not a whole number', (values != values.round()).any(axis=1)),
+    ]
+    for label, failed in checks:
+        reason = reason.mask(reason.isna() & failed, label)
+
+    valid = reason.isna().to_numpy()
+    rows = values[valid].astype(np.int64)
+    rows.insert(0, 'Tanggal', tanggal[valid].astype('datetime64[ns]'))
+    rows['Lokasi'] = lokasi[valid].astype(object)
+    rejected = df[~valid].assign(reason=reason[~valid])
+    return rows.reset_index(drop=True), rejected
+
+
+def _keys(df):
+    return zip(df['Tanggal'].to_numpy(dtype='datetime64[ns]').view(np.int64), df['Lokasi'])
+
+
+# Function to import one or more log files into the daily dataset. Rows whose
+# (Tanggal, Lokasi) is already stored, or seen earlier in the import, are
+# skipped. progress(report) is called after every chunk. Returns (report,
+# rejected rows).
+def import_files(sources, chunk_rows=CHUNK_ROWS, progress=None):
+    report = {'read': 0, 'added': 0, 'duplicates': 0, 'rejected': 0}
+    rejects = []
+    start = time.perf_counter()
+
+    def make_chunks(backend):
+        # Only the key columns of the stored history are read
+        seen = set(_keys(backend.read_columns('harian', KEY)))
+        for source in sources:
+            for raw in read_chunks(source, chunk_rows=chunk_rows):
+                rows, rejected = normalize_chunk(raw)
+                keys = list(_keys(rows))
+                new = np.fromiter((key not in seen for key in keys), dtype=bool, count=len(keys))
+                new &= ~rows.duplicated(KEY).to_numpy()
+                seen.update(itertools.compress(keys, new))
+
+                report['read'] += len(raw)
+                report['rejected'] += len(rejected)
+                report['duplicates'] += int((~new).sum())
+                report['added'] += int(new.sum())
+                if len(rejected) and sum(map(len, rejects)) < MAX_REJECTS:
+                    rejects.append(rejected)
+                if progress is not None:
+                    progress(dict(report, seconds=time.perf_counter() - start))
+                if new.any():
+                    yield rows[new]
+
+    data_store.append('harian', make_chunks)
+    seconds = time.perf_counter() - start
+    report['seconds'] = seconds
+    report['rows_per_sec'] = report['read'] / seconds if seconds else 0.0
+    rejected = pd.concat(rejects, ignore_index=True).head(MAX_REJECTS) if rejects else pd.DataFrame()
+    return report, rejected
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Bulk import daily compost house logs (.csv/.xlsx)')
+    parser.add_argument('files', nargs='+')
+    parser.add_argument('--chunk', type=int, default=CHUNK_ROWS, help='rows processed at a time')
+    parser.add_argument('--rejects', metavar='FILE', help='write the first rejected rows to this CSV file')
+    args = parser.parse_args()
+
+    def progress(report):
+        print(f"\r{report['read']} rows read, {report['read'] / max(report['seconds'], 1e-9):,.0f} rows/s",
+              end='', flush=True)
+
+    report, rejected = import_files(args.files, chunk_rows=args.chunk, progress=progress)
+    print(f"\n{report['added']} added, {report['duplicates']} duplicates skipped, "
+          f"{report['rejected']} rejected in {report['seconds']:.2f}s ({report['rows_per_sec']:,.0f} rows/s)")
+    if args.rejects and len(rejected):
+        rejected.to_csv(args.rejects, index=False)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,252 @@
+import argparse
+import contextlib
+import datetime
+import json
+import os
+
+import numpy as np
+import pandas as pd
+
+import storage
+
+try:
+    import fcntl
+except ImportError:  # Windows
+    fcntl = None
+    import msvcrt
+
+
+# Fold the journal into the base table once it holds this many entries
+COMPACT_THRESHOLD = 200
+
+JOURNAL_DIR = "Data"
+
+
+def journal_path(dataset):
+    return os.path.join(JOURNAL_DIR, f"{dataset}.journal.jsonl")
+
+
+def lock_path(dataset):
+    return os.path.join(JOURNAL_DIR, f"{dataset}.lock")
+
+
+# Cross-process lock on a file: shared for readers, exclusive for writers
+@contextlib.contextmanager
+def lock_file(path, exclusive=False):
+    with open(path, 'a+b') as file:
+        if fcntl is not None:
+            fcntl.flock(file, fcntl.LOCK_EX if exclusive else fcntl.LOCK_SH)
+        else:
+            file.seek(0)
+            msvcrt.locking(file.fileno(), msvcrt.LK_LOCK, 1)
+        try:
+            yield
+        finally:
+            if fcntl is not None:
+                fcntl.flock(file, fcntl.LOCK_UN)
+            else:
+                file.seek(0)
+                msvcrt.locking(file.fileno(), msvcrt.LK_UNLCK, 1)
+
+
+# Cross-process lock on a dataset
+def locked(dataset, exclusive=False):
+    return lock_file(lock_path(dataset), exclusive)
+
+
+def _json_default(value):
+    if isinstance(value, np.generic):
+        return value.item()
+    if isinstance(value, (pd.Timestamp, datetime.date)):
+        return value.isoformat()
+    raise TypeError(f"Cannot serialize {type(value).__name__} to the journal")
+
+
+def _read_entries(dataset):
+    path = journal_path(dataset)
+    if not os.path.exists(path):
+        return []
+    with open(path, encoding='utf-8') as file:
+        # A torn last line from a crashed writer is ignored
+        entries = []
+        for line in file:
+            try:
+                entries.append(json.loads(line))
+            except json.JSONDecodeError:
+                break
+        return entries
+
+
+def _append_entry(dataset, entry):
+    with open(journal_path(dataset), 'a', encoding='utf-8') as file:
+        file.write(json.dumps(entry, default=_json_default) + '\n')
+        file.flush()
+        os.fsync(file.fileno())
+
+
+# Apply journal entries to the base table. Record IDs are index labels, which
+# stay stable until the next compaction renumbers them.
+def replay(df, entries):
+    if not entries:
+        return df
+
+    new_rows = {}
+    updates = {}
+    deleted = set()
+    for entry in entries:
+        record_id = entry['id']
+        if entry['op'] == 'add':
+            new_rows[record_id] = entry['record']
+        elif entry['op'] == 'update':
+            if record_id in new_rows:
+                new_rows[record_id] = entry['record']
+            elif record_id in df.index and record_id not in deleted:
+                updates[record_id] = entry['record']
+        elif entry['op'] == 'delete':
+            new_rows.pop(record_id, None)
+            updates.pop(record_id, None)
+            if record_id in df.index:
+                deleted.add(record_id)
+
+    df = df.copy()
+    if updates:
+        changed = pd.DataFrame(list(updates.values()), index=list(updates))[df.columns]
+        df.loc[changed.index] = changed.astype(df.dtypes.to_dict())
+    if deleted:
+        df = df.drop(list(deleted))
+    if new_rows:
+        added = pd.DataFrame(list(new_rows.values()), index=list(new_rows))[df.columns]
+        df = pd.concat([df, added.astype(df.dtypes.to_dict())])
+    return df
+
+
+# Change signature of a dataset: base table plus its journal
+def signature(dataset):
+    backend = storage.get_backend()
+    if hasattr(backend, 'version'):
+        # Both tables share one database file, so it keeps a counter per table
+        version = (backend.name, backend.version(dataset))
+    else:
+        stat = os.stat(backend.path(dataset))
+        version = (backend.name, stat.st_mtime_ns, stat.st_size)
+    path = journal_path(dataset)
+    if os.path.exists(path):
+        stat = os.stat(path)
+        version += (stat.st_mtime_ns, stat.st_size)
+    return version
+
+
+# Consistent view of a dataset: base table with the journal replayed on top
+def snapshot(dataset):
+    backend = storage.get_backend()
+    with locked(dataset):
+        df = backend.read(dataset)
+        entries = _read_entries(dataset)
+    return replay(df, entries)
+
+
+def _next_id(backend, dataset, entries):
+    ids = [entry['id'] for entry in entries if entry['op'] == 'add']
+    return max([backend.next_id(dataset)] + [record_id + 1 for record_id in ids])
+
+
+# True when changes are waiting in the journal for the next compaction
+def pending(dataset):
+    return os.path.exists(journal_path(dataset))
+
+
+# Write one entry and return (entry, version before, version after), with
+# both versions taken under the lock so they bracket exactly this change
+def _write(dataset, make_entry):
+    backend = storage.get_backend()
+    with locked(dataset, exclusive=True):
+        before = signature(dataset)
+        entries = _read_entries(dataset)
+        entry = make_entry(backend, entries)
+        if hasattr(backend, 'apply') and not entries:
+            # Transactional backends take the change in place, no journal needed
+            backend.apply(dataset, entry)
+            return entry, before, signature(dataset)
+        _append_entry(dataset, entry)
+        after = signature(dataset)
+    if len(entries) + 1 >= COMPACT_THRESHOLD:
+        compact(dataset)
+    return entry, before, after
+
+
+# Function to append a new record; the new ID is in the returned entry
+def add(dataset, record):
+    return _write(dataset, lambda backend, entries: {
+        'op': 'add', 'id': _next_id(backend, dataset, entries), 'record': record,
+    })
+
+
+def update(dataset, record_id, record):
+    return _write(dataset, lambda backend, entries: {'op': 'update', 'id': int(record_id), 'record': record})
+
+
+def delete(dataset, record_id):
+    return _write(dataset, lambda backend, entries: {'op': 'delete', 'id': int(record_id)})
+
+
+def _discard_journal(dataset):
+    path = journal_path(dataset)
+    if os.path.exists(path):
+        os.remove(path)
+
+
+# Fold the journal into the base table, with the writer lock held
+def _fold(backend, dataset):
+    entries = _read_entries(dataset)
+    if not entries:
+        return 0
+    df = replay(backend.read(dataset), entries)
+    backend.write(dataset, df.reset_index(drop=True))
+    _discard_journal(dataset)
+    return len(entries)
+
+
+# Fold the journal into the base table and start a new, empty journal.
+# The base file is replaced atomically before the journal is removed.
+def compact(dataset):
+    backend = storage.get_backend()
+    with locked(dataset, exclusive=True):
+        return _fold(backend, dataset)
+
+
+# Function to append rows in bulk, e.g. imports. Pending journal entries are
+# folded in first; make_chunks(backend) then yields the DataFrames to append
+# and may read the base table (to skip duplicates) under the same lock.
+# Returns (rows appended, version before, version after).
+def append(dataset, make_chunks):
+    backend = storage.get_backend()
+    with locked(dataset, exclusive=True):
+        before = signature(dataset)
+        _fold(backend, dataset)
+        rows = backend.append(dataset, make_chunks(backend))
+        after = signature(dataset)
+    return rows, before, after
+
+
+# Replace the whole dataset, e.g. for imports, dropping pending journal entries
+def replace(dataset, df):
+    backend = storage.get_backend()
+    with locked(dataset, exclusive=True):
+        backend.write(dataset, df.reset_index(drop=True))
+        _discard_journal(dataset)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Smart waste record journal')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+    compact_parser = subparsers.add_parser('compact', help='fold journal entries into the base table')
+    compact_parser.add_argument('dataset', nargs='*', default=sorted(storage.SCHEMAS))
+
+    args = parser.parse_args()
+    if args.command == 'compact':
+        for dataset in args.dataset:
+            print(f"{dataset}: {compact(dataset)} journal entries compacted")
+
+
+if __name__ == '__main__':
+    main()
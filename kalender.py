@@ -0,0 +1,58 @@
+import numpy as np
+import pandas as pd
+
+
+# Nama bulan dalam urutan kalender, seperti yang dipakai di form input
+MONTH_NAMES = [
+    "January", "February", "March", "April", "May", "June",
+    "July", "August", "September", "October", "November", "December",
+]
+BULAN = [
+    "Januari", "Februari", "Maret", "April", "Mei", "Juni",
+    "Juli", "Agustus", "September", "Oktober", "November", "Desember",
+]
+
+# Lower-case English/Indonesian names and three-letter abbreviations -> 1..12
+MONTH_NUMBERS = {}
+for number, names in enumerate(zip(MONTH_NAMES, BULAN), start=1):
+    for name in names:
+        MONTH_NUMBERS[name.lower()] = number
+        MONTH_NUMBERS[name[:3].lower()] = number
+MONTH_NUMBERS['agt'] = 8
+
+
+# Function to turn a column of month names (or numbers) into ints 1..12.
+# Names are looked up once per distinct value, not once per row.
+def month_numbers(months):
+    months = pd.Series(months)
+    if pd.api.types.is_numeric_dtype(months):
+        return months.to_numpy(dtype=np.int64)
+
+    codes, uniques = pd.factorize(months)
+    lookup = np.array([MONTH_NUMBERS.get(str(name).strip().lower(), 0) for name in uniques], dtype=np.int64)
+    unknown = [name for name, number in zip(uniques, lookup) if number == 0]
+    if unknown or (codes < 0).any():
+        raise ValueError(f"Unknown month name(s): {unknown or ['<missing>']}")
+    return lookup[codes]
+
+
+def month_number(month):
+    return int(month_numbers([month])[0])
+
+
+# Months since 1970-01, the ordinal pandas uses for monthly periods
+def _month_ordinals(years, months):
+    years = pd.Series(years).to_numpy(dtype=np.int64)
+    return (years - 1970) * 12 + month_numbers(months) - 1
+
+
+# Function to build a monthly PeriodIndex from Tahun and Bulan columns
+def period_index(years, months):
+    ordinals = _month_ordinals(years, months)
+    return pd.PeriodIndex(pd.arrays.PeriodArray(ordinals, dtype=pd.PeriodDtype('M')))
+
+
+# Function to build a DatetimeIndex of month starts from Tahun and Bulan columns
+def month_starts(years, months):
+    ordinals = _month_ordinals(years, months)
+    return pd.DatetimeIndex(ordinals.astype('datetime64[M]').astype('datetime64[ns]'))
@@ -0,0 +1,185 @@
+import argparse
+import datetime
+import glob
+import os
+import pickle
+import re
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+
+import data_store
+import model_registry
+import rollups
+import storage
+
+
+# One model per (Lokasi, category, frequency), fitted on the daily dataset
+MODEL_DIR = os.path.join(model_registry.MODEL_DIR, "lokasi")
+# Resample frequency -> seasonal period given to auto_arima (1 = non-seasonal)
+FREQUENCIES = {
+    'W': 1,
+    'D': 7,
+}
+
+
+def _slug(name):
+    return re.sub(r'[^0-9a-z]+', '_', str(name).lower()).strip('_')
+
+
+def model_path(location, feature, freq='W'):
+    return os.path.join(MODEL_DIR, f"{_slug(location)}.{_slug(feature)}.{freq}.pkl")
+
+
+# Totals of one category at one location per day ('D') or week ('W'); days
+# without records count as zero
+def series(location, feature, freq='W'):
+    daily = rollups.get('lokasi_harian')
+    daily = daily[daily['Lokasi'] == location].set_index('Tanggal')[feature]
+    return daily.resample(freq).sum().astype(np.float64)
+
+
+def _write_pickle(path, obj):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.pkl')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            pickle.dump(obj, file)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Function to fit and persist the model of one series. Runs in a worker
+# process; the file holds the model together with what is needed to serve it.
+def fit(location, feature, freq, values, last_date, data_version):
+    # Imported here: serving forecasts only unpickles models
+    import pmdarima
+
+    m = FREQUENCIES[freq]
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        model = pmdarima.auto_arima(
+            values, seasonal=m > 1, m=m,
+            error_action='ignore', suppress_warnings=True,
+        )
+
+    entry = {
+        'model': model,
+        'Lokasi': location,
+        'feature': feature,
+        'freq': freq,
+        'nobs': len(values),
+        'last_date': last_date,
+        'data_version': list(data_version),
+        'trained_at': datetime.datetime.now().isoformat(timespec='seconds'),
+    }
+    _write_pickle(model_path(location, feature, freq), entry)
+    return {
+        'Lokasi': location,
+        'feature': feature,
+        'freq': freq,
+        'nobs': len(values),
+        'order': str(model.order),
+        'seasonal_order': str(model.seasonal_order),
+        'aic': float(model.aic()),
+    }
+
+
+def _trained_version(path):
+    if not os.path.exists(path):
+        return None
+    return model_registry.get_model(path)['data_version']
+
+
+# Function to fit every (location, category) series across a process pool.
+# Series whose model was already fitted on the current data are skipped
+# unless force=True.
+def train_all(freq='W', locations=None, features=None, executor='process', max_workers=None, force=False):
+    if freq not in FREQUENCIES:
+        raise ValueError(f"Unknown frequency: {freq}")
+    os.makedirs(MODEL_DIR, exist_ok=True)
+    version = data_store.data_version('harian')
+    if locations is None:
+        locations = sorted(location for location in data_store.distinct('harian', 'Lokasi') if pd.notna(location))
+    features = storage.MEASURES if features is None else list(features)
+
+    jobs = []
+    for location in locations:
+        for feature in features:
+            path = model_path(location, feature, freq)
+            if not force and _trained_version(path) == list(version):
+                continue
+            values = series(location, feature, freq)
+            jobs.append((location, feature, freq, values.to_numpy(), values.index[-1], version))
+
+    if executor == 'sequential' or not jobs:
+        reports = [fit(*job) for job in jobs]
+    else:
+        pool_class = {'process': ProcessPoolExecutor, 'thread': ThreadPoolExecutor}[executor]
+        with pool_class(max_workers=max_workers) as pool:
+            futures = [pool.submit(fit, *job) for job in jobs]
+            reports = [future.result() for future in as_completed(futures)]
+    return pd.DataFrame(reports, columns=['Lokasi', 'feature', 'freq', 'nobs', 'order', 'seasonal_order', 'aic'])
+
+
+# Persisted models, one row per series
+def available():
+    rows = []
+    for path in sorted(glob.glob(os.path.join(MODEL_DIR, '*.pkl'))):
+        entry = model_registry.get_model(path)
+        rows.append({
+            'Lokasi': entry['Lokasi'],
+            'feature': entry['feature'],
+            'freq': entry['freq'],
+            'nobs': entry['nobs'],
+            'last_date': entry['last_date'],
+            'trained_at': entry['trained_at'],
+            'current': entry['data_version'] == list(data_store.data_version('harian')),
+        })
+    return pd.DataFrame(rows, columns=['Lokasi', 'feature', 'freq', 'nobs', 'last_date', 'trained_at', 'current'])
+
+
+# Function to forecast one series from its persisted model, without refitting.
+# Raises FileNotFoundError when that series has not been trained.
+def forecast(location, feature, freq='W', horizon=12):
+    path = model_path(location, feature, freq)
+    if not os.path.exists(path):
+        raise FileNotFoundError(f"No model for {location} / {feature} ({freq}); run: python location_forecasting.py train --freq {freq}")
+    entry = model_registry.get_model(path)
+    values, interval = entry['model'].predict(n_periods=horizon, return_conf_int=True)
+    dates = pd.date_range(start=entry['last_date'], periods=horizon + 1, freq=freq)[1:]
+    return pd.DataFrame({
+        'Lokasi': location,
+        'feature': feature,
+        'Date': dates,
+        'value': np.asarray(values, dtype=np.float64),
+        'lower': interval[:, 0],
+        'upper': interval[:, 1],
+    })
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Per-location forecasts on the daily dataset')
+    commands = parser.add_subparsers(dest='command', required=True)
+    train = commands.add_parser('train', help='fit one model per location and category')
+    train.add_argument('--freq', choices=list(FREQUENCIES), default='W')
+    train.add_argument('--executor', choices=['sequential', 'thread', 'process'], default='process')
+    train.add_argument('--workers', type=int)
+    train.add_argument('--force', action='store_true', help='refit series that are already up to date')
+    commands.add_parser('list', help='show the persisted models')
+    args = parser.parse_args()
+
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        if args.command == 'train':
+            print(train_all(args.freq, executor=args.executor, max_workers=args.workers, force=args.force))
+        else:
+            print(available())
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,192 @@
+import glob
+import hashlib
+import os
+import pickle
+import threading
+import time
+import tracemalloc
+
+import numpy as np
+import pandas as pd
+
+import profiler
+import shared_cache
+
+
+MODEL_DIR = "Model"
+MODEL_PATTERN = "model_*.pkl"
+
+# Process-wide registry: path -> entry dict, shared by every Streamlit session
+_models = {}
+# Memoized forecasts: (model sha256, data version, horizon) -> (in_sample, out_sample)
+_forecasts = {}
+# path -> ((mtime_ns, size), sha256) of model files, known without unpickling
+_hashes = {}
+_load_locks = {}
+_lock = threading.Lock()
+
+
+def _file_sha256(path):
+    digest = hashlib.sha256()
+    with open(path, 'rb') as file:
+        for chunk in iter(lambda: file.read(1 << 20), b''):
+            digest.update(chunk)
+    return digest.hexdigest()
+
+
+def _stat(path):
+    stat = os.stat(path)
+    return stat.st_mtime_ns, stat.st_size
+
+
+# Unpickle one model, recording how long it took and how much memory it allocated
+def _load_entry(path):
+    # Taken before reading, so a file swapped during the load is picked up next time
+    stat = _stat(path)
+    # Memory figures of models loaded concurrently are approximate, since
+    # tracing is process-wide
+    profiler.start_tracing()
+    try:
+        before, _ = tracemalloc.get_traced_memory()
+        start = time.perf_counter()
+
+        with profiler.stage('model_registry.load'), open(path, 'rb') as file:
+            model = pickle.load(file)
+
+        load_seconds = time.perf_counter() - start
+        after, _ = tracemalloc.get_traced_memory()
+    finally:
+        profiler.stop_tracing()
+
+    return {
+        'model': model,
+        'path': path,
+        'stat': stat,
+        'sha256': _file_sha256(path),
+        'file_bytes': os.path.getsize(path),
+        'load_seconds': load_seconds,
+        'memory_bytes': max(after - before, 0),
+    }
+
+
+# Registry entry of a model, unpickled again when the file was replaced
+# (e.g. by retraining.py)
+def _entry(path):
+    with _lock:
+        entry = _models.get(path)
+        path_lock = _load_locks.setdefault(path, threading.Lock())
+    if entry is not None and entry['stat'] == _stat(path):
+        return entry
+
+    # Different models load concurrently; the same model is only unpickled once
+    with path_lock:
+        with _lock:
+            entry = _models.get(path)
+        if entry is None or entry['stat'] != _stat(path):
+            stale = entry
+            entry = _load_entry(path)
+            with _lock:
+                _models[path] = entry
+                if stale is not None and stale['sha256'] != entry['sha256']:
+                    for key in [k for k in _forecasts if k[0] == stale['sha256']]:
+                        del _forecasts[key]
+    return entry
+
+
+# Load every Model/model_*.pkl that is not in the registry yet
+def load_all(model_dir=MODEL_DIR):
+    for path in sorted(glob.glob(os.path.join(model_dir, MODEL_PATTERN))):
+        _entry(path)
+    return list(_models)
+
+
+def get_model(path):
+    return _entry(path)['model']
+
+
+# Content hash of the model currently in the file, for cache keys. The model
+# itself is not unpickled.
+def model_version(path):
+    # Taken before hashing, so a file swapped meanwhile is hashed again next time
+    stat = _stat(path)
+    with _lock:
+        entry = _models.get(path)
+        known = _hashes.get(path)
+    if entry is not None and entry['stat'] == stat:
+        return entry['sha256']
+    if known is not None and known[0] == stat:
+        return known[1]
+    sha256 = _file_sha256(path)
+    with _lock:
+        _hashes[path] = (stat, sha256)
+    return sha256
+
+
+# Predictions of a model, from the shared cache tier when another process
+# already computed them (then the model is not even unpickled here); stored
+# there as one long frame
+def _shared_predict(path, sha256, data_version, horizon):
+    key = (sha256, horizon)
+    frame = shared_cache.get_frame('predict', key, list(data_version))
+    if frame is not None:
+        parts = frame.groupby('part', sort=False)['value']
+        return tuple(parts.get_group(part).rename(None) for part in ('in_sample', 'out_sample'))
+
+    entry = _entry(path)
+    with profiler.stage('model_registry.predict'):
+        result = (entry['model'].predict_in_sample(), entry['model'].predict(n_periods=horizon))
+    frame = pd.concat([
+        pd.Series(values, dtype=np.float64).to_frame('value').assign(part=part)
+        for part, values in zip(('in_sample', 'out_sample'), result)
+    ])
+    # Keyed by the model actually loaded, in case the file was just replaced
+    shared_cache.put_frame('predict', (entry['sha256'], horizon), list(data_version), frame)
+    return result
+
+
+# In-sample and out-of-sample predictions for a model, computed once per
+# (model file hash, dataset version, horizon)
+def predict(path, data_version, horizon=12):
+    key = (model_version(path), data_version, horizon)
+    with _lock:
+        result = _forecasts.get(key)
+    profiler.count('predict.miss' if result is None else 'predict.hit')
+    if result is None:
+        result = _shared_predict(path, key[0], data_version, horizon)
+        with _lock:
+            # Keep only the latest dataset version per model and horizon
+            for stale in [k for k in _forecasts if k[0] == key[0] and k[2] == horizon]:
+                del _forecasts[stale]
+            _forecasts[key] = result
+    in_sample, out_sample = result
+    return in_sample.copy(), out_sample.copy()
+
+
+# Load time and memory footprint of every model held by the registry
+def model_stats():
+    with _lock:
+        rows = [
+            {
+                'model': os.path.basename(entry['path']),
+                'sha256': entry['sha256'][:12],
+                'file_bytes': entry['file_bytes'],
+                'load_seconds': entry['load_seconds'],
+                'memory_bytes': entry['memory_bytes'],
+            }
+            for entry in _models.values()
+        ]
+    return pd.DataFrame(rows, columns=['model', 'sha256', 'file_bytes', 'load_seconds', 'memory_bytes'])
+
+
+# Forget memoized forecasts, e.g. after the dataset changed
+def clear_forecasts():
+    with _lock:
+        _forecasts.clear()
+
+
+# Drop every loaded model and memoized forecast
+def reset():
+    with _lock:
+        _models.clear()
+        _hashes.clear()
+        _forecasts.clear()
@@ -0,0 +1,210 @@
+import contextlib
+import contextvars
+import functools
+import json
+import os
+import threading
+import time
+import tracemalloc
+from collections import Counter
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+
+# Stage timings, peak memory and cache counters of a dashboard rerun (or API
+# request). Nothing is recorded outside profiler.run(), so instrumented code
+# pays a single context variable lookup when profiling is off.
+#
+#   SMARTWASTE_PROFILE=1            record every rerun (otherwise only ?debug=1)
+#   SMARTWASTE_PROFILE_LOG=file     append each recorded run as a JSON line
+#   SMARTWASTE_PROFILE_PORT=9100    serve the totals as Prometheus text on /metrics
+
+ENABLED = os.environ.get('SMARTWASTE_PROFILE', '') not in ('', '0')
+LOG_PATH = os.environ.get('SMARTWASTE_PROFILE_LOG')
+
+_current = contextvars.ContextVar('profiler_run', default=None)
+
+# Totals over every recorded run: stage -> [calls, seconds, peak bytes]
+_stages = {}
+_counters = Counter()
+_runs = 0
+_lock = threading.Lock()
+
+_tracing_users = 0
+_started_tracing = False
+_server = None
+
+
+# Keep tracemalloc running while anyone needs it (profiled runs, model loads)
+def start_tracing():
+    global _tracing_users, _started_tracing
+    with _lock:
+        if _tracing_users == 0 and not tracemalloc.is_tracing():
+            tracemalloc.start()
+            _started_tracing = True
+        _tracing_users += 1
+
+
+def stop_tracing():
+    global _tracing_users, _started_tracing
+    with _lock:
+        _tracing_users -= 1
+        if _tracing_users == 0 and _started_tracing:
+            tracemalloc.stop()
+            _started_tracing = False
+
+
+class Run:
+    def __init__(self, name):
+        self.name = name
+        self.stages = []
+        self.counters = Counter()
+        self._stack = []
+
+    # Peak traced memory is process-wide: with concurrent sessions the
+    # per-stage peaks are upper bounds
+    @contextlib.contextmanager
+    def stage(self, name):
+        parent = self._stack[-1] if self._stack else None
+        if parent is not None:
+            parent['peak_bytes'] = max(parent['peak_bytes'], tracemalloc.get_traced_memory()[1])
+        tracemalloc.reset_peak()
+        record = {'stage': name, 'depth': len(self._stack), 'seconds': 0.0, 'peak_bytes': 0}
+        self.stages.append(record)
+        self._stack.append(record)
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            record['seconds'] = time.perf_counter() - start
+            record['peak_bytes'] = max(record['peak_bytes'], tracemalloc.get_traced_memory()[1])
+            self._stack.pop()
+            if parent is not None:
+                parent['peak_bytes'] = max(parent['peak_bytes'], record['peak_bytes'])
+
+    def as_dict(self):
+        return {'run': self.name, 'stages': self.stages, 'counters': dict(self.counters)}
+
+
+_NULL = contextlib.nullcontext()
+
+
+# Function to time a block as a stage of the current run
+def stage(name):
+    current = _current.get()
+    if current is None:
+        return _NULL
+    return current.stage(name)
+
+
+# Decorator timing every call of a function as a stage
+def timed(name=None):
+    def decorate(function):
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def wrapper(*args, **kwargs):
+            current = _current.get()
+            if current is None:
+                return function(*args, **kwargs)
+            with current.stage(label):
+                return function(*args, **kwargs)
+        return wrapper
+    return decorate
+
+
+# Count an event of the current run, e.g. 'charts.hit' / 'charts.miss'
+def count(event, n=1):
+    current = _current.get()
+    if current is not None:
+        current.counters[event] += n
+
+
+def _finish(record):
+    global _runs
+    with _lock:
+        _runs += 1
+        for entry in record.stages:
+            totals = _stages.setdefault(entry['stage'], [0, 0.0, 0])
+            totals[0] += 1
+            totals[1] += entry['seconds']
+            totals[2] = max(totals[2], entry['peak_bytes'])
+        _counters.update(record.counters)
+    if LOG_PATH:
+        line = json.dumps({'time': time.time(), **record.as_dict()})
+        with _lock, open(LOG_PATH, 'a', encoding='utf-8') as file:
+            file.write(line + '\n')
+
+
+# Function to record everything inside the block as one run. Yields the Run,
+# or None when profiling is off (enabled defaults to SMARTWASTE_PROFILE).
+@contextlib.contextmanager
+def run(name='rerun', enabled=None):
+    if not (ENABLED if enabled is None else enabled) or _current.get() is not None:
+        yield None
+        return
+    record = Run(name)
+    token = _current.set(record)
+    start_tracing()
+    try:
+        with record.stage(name):
+            yield record
+    finally:
+        stop_tracing()
+        _current.reset(token)
+        _finish(record)
+
+
+def _label(value):
+    return str(value).replace('\\', '\\\\').replace('"', '\\"')
+
+
+# Totals of every recorded run in the Prometheus text format
+def prometheus():
+    with _lock:
+        stages = {name: list(totals) for name, totals in _stages.items()}
+        counters = dict(_counters)
+        runs = _runs
+    lines = [
+        '# TYPE smartwaste_profiled_runs_total counter',
+        f'smartwaste_profiled_runs_total {runs}',
+        '# TYPE smartwaste_stage_seconds summary',
+    ]
+    for name, (calls, seconds, _) in sorted(stages.items()):
+        lines.append(f'smartwaste_stage_seconds_sum{{stage="{_label(name)}"}} {seconds:.6f}')
+        lines.append(f'smartwaste_stage_seconds_count{{stage="{_label(name)}"}} {calls}')
+    lines.append('# TYPE smartwaste_stage_peak_bytes gauge')
+    for name, (_, _, peak) in sorted(stages.items()):
+        lines.append(f'smartwaste_stage_peak_bytes{{stage="{_label(name)}"}} {peak}')
+    lines.append('# TYPE smartwaste_events_total counter')
+    for event, total in sorted(counters.items()):
+        lines.append(f'smartwaste_events_total{{event="{_label(event)}"}} {total}')
+    return '\n'.join(lines) + '\n'
+
+
+class _MetricsHandler(BaseHTTPRequestHandler):
+    def do_GET(self):
+        if self.path.split('?')[0] != '/metrics':
+            self.send_error(404)
+            return
+        body = prometheus().encode('utf-8')
+        self.send_response(200)
+        self.send_header('Content-Type', 'text/plain; version=0.0.4')
+        self.send_header('Content-Length', str(len(body)))
+        self.end_headers()
+        self.wfile.write(body)
+
+    def log_message(self, *args):
+        pass
+
+
+# Function to serve /metrics from a background thread, once per process
+def serve(port=None, host='127.0.0.1'):
+    global _server
+    port = port or os.environ.get('SMARTWASTE_PROFILE_PORT')
+    if not port:
+        return None
+    with _lock:
+        if _server is None:
+            _server = ThreadingHTTPServer((host, int(port)), _MetricsHandler)
+            threading.Thread(target=_server.serve_forever, name='profiler-metrics', daemon=True).start()
+    return _server
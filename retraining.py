@@ -0,0 +1,185 @@
+import argparse
+import datetime
+import hashlib
+import json
+import os
+import pickle
+import tempfile
+import warnings
+from concurrent.futures import ProcessPoolExecutor, ThreadPoolExecutor, as_completed
+
+import numpy as np
+import pandas as pd
+import pmdarima
+from statsmodels.stats.diagnostic import acorr_ljungbox
+
+import data_store
+import forecasting
+import model_registry
+
+
+# Every model that was installed or replaced, named <model>.<sha256[:12]>.pkl
+VERSION_DIR = os.path.join(model_registry.MODEL_DIR, "versions")
+HISTORY = os.path.join(VERSION_DIR, "history.jsonl")
+
+# After update(), a full auto_arima refit is done when the residuals became
+# autocorrelated (Ljung-Box p-value dropped below this) ...
+LJUNG_BOX_ALPHA = 0.05
+# ... or the one-step errors on the new observations exceed this multiple of
+# the residual RMSE on the observations the model already had
+RMSE_TOLERANCE = 2.0
+
+
+# Observations of a category, in the same order compute_forecast plots them
+def series(df, feature):
+    return df[feature].dropna().to_numpy(dtype=np.float64)
+
+
+def _rmse(values):
+    return float(np.sqrt(np.mean(np.square(values)))) if len(values) else 0.0
+
+
+# Residual checks of a fitted model; the last `new` residuals are reported apart
+def diagnostics(model, new=0):
+    # The first d residuals are the undifferenced start values
+    resid = np.asarray(model.resid(), dtype=np.float64)[model.order[1]:]
+    lags = max(1, min(10, len(resid) // 5))
+    ljung_box_p = acorr_ljungbox(resid, lags=[lags])['lb_pvalue'].iloc[0]
+    split = len(resid) - new
+    return {
+        'aic': float(model.aic()),
+        'ljung_box_p': float(ljung_box_p),
+        'rmse': _rmse(resid[:split]),
+        'new_rmse': _rmse(resid[split:]),
+    }
+
+
+def _degraded(before, after):
+    if after['ljung_box_p'] < LJUNG_BOX_ALPHA <= before['ljung_box_p']:
+        return True
+    return after['new_rmse'] > RMSE_TOLERANCE * after['rmse']
+
+
+def _refit(model, values):
+    # Same seasonality as the model being replaced
+    m = model.seasonal_order[3]
+    return pmdarima.auto_arima(
+        values, seasonal=m > 1, m=max(m, 1),
+        error_action='ignore', suppress_warnings=True,
+    )
+
+
+# Function to bring one model up to date with the observations of its category.
+# Returns (report, model), model being None when nothing changed. Runs in a
+# worker process, so it only touches the model file for reading.
+def refresh(feature, path, values):
+    with open(path, 'rb') as file:
+        model = pickle.load(file)
+    history = np.asarray(model.arima_res_.data.endog, dtype=np.float64).ravel()
+    report = {'feature': feature, 'nobs_before': len(history), 'nobs': len(values)}
+
+    with warnings.catch_warnings():
+        warnings.simplefilter('ignore')
+        # Only appended observations can be folded in with update()
+        if len(values) >= len(history) and np.allclose(values[:len(history)], history):
+            new = values[len(history):]
+            if not len(new):
+                return {**report, 'method': 'unchanged'}, None
+            before = diagnostics(model)
+            model.update(new)
+            after = diagnostics(model, len(new))
+            if not _degraded(before, after):
+                return {**report, 'method': 'update', **after}, model
+            reason = 'diagnostics degraded'
+        else:
+            reason = 'history changed'
+
+        model = _refit(model, values)
+        return {**report, 'method': 'refit', 'reason': reason, **diagnostics(model)}, model
+
+
+def _write_bytes(path, payload):
+    fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), prefix='.tmp-', suffix='.pkl')
+    try:
+        with os.fdopen(fd, 'wb') as file:
+            file.write(payload)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+def _version_path(path, sha256):
+    name = os.path.splitext(os.path.basename(path))[0]
+    return os.path.join(VERSION_DIR, f"{name}.{sha256[:12]}.pkl")
+
+
+# Function to keep the current and the new model under versions/, then swap the
+# new one in with a single rename: readers see either the old or the new file
+def install(path, model):
+    os.makedirs(VERSION_DIR, exist_ok=True)
+    with open(path, 'rb') as file:
+        current = file.read()
+    previous_sha = hashlib.sha256(current).hexdigest()
+    if not os.path.exists(_version_path(path, previous_sha)):
+        _write_bytes(_version_path(path, previous_sha), current)
+
+    payload = pickle.dumps(model)
+    sha256 = hashlib.sha256(payload).hexdigest()
+    _write_bytes(_version_path(path, sha256), payload)
+    _write_bytes(path, payload)
+    return {'previous': previous_sha, 'sha256': sha256}
+
+
+def _log(report):
+    with open(HISTORY, 'a', encoding='utf-8') as file:
+        file.write(json.dumps(report) + '\n')
+
+
+# Function to refresh every category model in parallel and install the changed
+# ones. Returns one report row per category.
+def retrain_all(df=None, features=None, executor='process', max_workers=None):
+    version = data_store.data_version('bulanan')
+    if df is None:
+        df = data_store.load_bulanan()
+    features = list(forecasting.FORECAST_MODELS) if features is None else list(features)
+    jobs = {feature: forecasting.FORECAST_MODELS[feature] for feature in features}
+
+    if executor == 'sequential':
+        results = [refresh(feature, path, series(df, feature)) for feature, path in jobs.items()]
+    else:
+        pool_class = {'process': ProcessPoolExecutor, 'thread': ThreadPoolExecutor}[executor]
+        with pool_class(max_workers=max_workers or len(jobs)) as pool:
+            futures = [pool.submit(refresh, feature, path, series(df, feature)) for feature, path in jobs.items()]
+            results = [future.result() for future in as_completed(futures)]
+
+    reports = []
+    for report, model in results:
+        if model is not None:
+            report.update(install(jobs[report['feature']], model))
+            _log({
+                'time': datetime.datetime.now().isoformat(timespec='seconds'),
+                'data_version': list(version),
+                **report,
+            })
+        reports.append(report)
+
+    reports.sort(key=lambda report: features.index(report['feature']))
+    return pd.DataFrame(reports)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Update the forecast models with new monthly data')
+    parser.add_argument('--executor', choices=['sequential', 'thread', 'process'], default='process')
+    parser.add_argument('--feature', action='append', choices=list(forecasting.FORECAST_MODELS),
+                        help='category to retrain (repeatable, default: all)')
+    args = parser.parse_args()
+
+    reports = retrain_all(features=args.feature, executor=args.executor)
+    with pd.option_context('display.width', 160, 'display.max_columns', None):
+        print(reports)
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,186 @@
+import threading
+
+import numpy as np
+import pandas as pd
+
+import artifacts
+import data_store
+import kalender
+import profiler
+import schema
+import shared_cache
+import storage
+
+
+CATEGORIES = storage.MEASURES
+
+# Rollup name -> (dataset, key columns). Daily keys are derived from Tanggal:
+# the day itself for 'lokasi_harian' and the calendar month for 'lokasi_bulanan'.
+ROLLUPS = {
+    'tahunan': ('bulanan', ['Tahun']),
+    'bulanan': ('bulanan', ['Tahun', 'Bulan']),
+    'lokasi': ('harian', ['Lokasi']),
+    'lokasi_harian': ('harian', ['Lokasi', 'Tanggal']),
+    'lokasi_bulanan': ('harian', ['Lokasi', 'Periode']),
+}
+
+# The same daily keys in SQL, over Tanggal as stored ('YYYY-MM-DD HH:MM:SS')
+SQL_KEYS = {'Tanggal': 'substr("Tanggal", 1, 10)', 'Periode': 'substr("Tanggal", 1, 7)'}
+
+# Materialized rollups: dataset -> (data version, {rollup name: DataFrame})
+_rollups = {}
+_lock = threading.Lock()
+
+
+def _with_keys(df, dataset):
+    if dataset == 'harian':
+        tanggal = pd.to_datetime(df['Tanggal'])
+        df = df.assign(Tanggal=tanggal.dt.normalize(), Periode=tanggal.dt.to_period('M'))
+    return df
+
+
+# Sum 'rows' and the categories per key. Totals are int64 whatever the
+# compact dtype of the source columns.
+def _sum(df, keys):
+    columns = keys + ['rows'] + CATEGORIES
+    return df[columns].groupby(keys, observed=True).sum().astype(np.int64)
+
+
+# Sum the categories per key, with a 'rows' count of contributing records
+def _aggregate(df, keys):
+    return _sum(df.assign(rows=1), keys)
+
+
+# Rollup grouped by the backend, typed and ordered like one computed here
+def _aggregate_in_backend(backend, dataset, keys):
+    df = backend.aggregate(dataset, keys, SQL_KEYS)
+    columns = [key for key in keys if key in storage.SCHEMAS[dataset].names]
+    df = df.assign(**schema.compact(dataset, df[columns]))
+    if 'Periode' in keys:
+        df['Periode'] = pd.PeriodIndex(df['Periode'], freq='M')
+    df = df.astype({column: np.int64 for column in ['rows'] + CATEGORIES})
+    return df.sort_values(keys).reset_index(drop=True)
+
+
+# Function to compute every rollup of a dataset, in SQL when the backend
+# supports it, else from the loaded rows
+def build(dataset):
+    names = [name for name, (rollup_dataset, _) in ROLLUPS.items() if rollup_dataset == dataset]
+    backend = data_store.query_backend(dataset)
+    if backend is not None and hasattr(backend, 'aggregate'):
+        return {name: _aggregate_in_backend(backend, dataset, ROLLUPS[name][1]) for name in names}
+    df = _with_keys(data_store.load(dataset), dataset)
+    return {name: _aggregate(df, ROLLUPS[name][1]).reset_index() for name in names}
+
+
+# Rollups precomputed by batch.py for this exact data version, or shared by
+# another process, else computed here
+def _load(dataset, version):
+    names = [name for name, (rollup_dataset, _) in ROLLUPS.items() if rollup_dataset == dataset]
+    frames = {name: artifacts.read(f"rollup_{name}", version) for name in names}
+    if all(frame is not None for frame in frames.values()):
+        profiler.count('rollups.artifact')
+        return frames
+
+    frames = {name: shared_cache.get_frame('rollup', name, version) for name in names}
+    if all(frame is not None for frame in frames.values()):
+        profiler.count('rollups.shared')
+        return frames
+
+    with profiler.stage(f'rollups.build {dataset}'):
+        frames = build(dataset)
+    for name, frame in frames.items():
+        shared_cache.put_frame('rollup', name, version, frame)
+    return frames
+
+
+# Key dtypes of a rollup for rows that include plain values: categoricals
+# take in any new value, sorted as a rebuild would (months in calendar order)
+def _key_dtypes(frame, combined, keys):
+    dtypes = {}
+    for key in keys:
+        dtype = frame[key].dtype
+        if isinstance(dtype, pd.CategoricalDtype):
+            categories = dtype.categories.union(pd.Index(combined[key].dropna().unique()))
+            if key == 'Bulan':
+                categories = categories[kalender.month_numbers(categories).argsort(kind='stable')]
+            dtype = pd.CategoricalDtype(categories, ordered=dtype.ordered)
+        dtypes[key] = dtype
+    return dtypes
+
+
+# Fold one record change into every rollup of the dataset: the old row is
+# subtracted, the new row added, and keys left without records are dropped.
+# The result has the dtypes and row order of a full rebuild.
+def _apply(frames, dataset, old_row, new_row):
+    signed = [(row, sign) for row, sign in ((old_row, -1), (new_row, 1)) if row is not None]
+    delta = _with_keys(pd.DataFrame([row for row, _ in signed]), dataset)
+    signs = pd.Series([sign for _, sign in signed], index=delta.index)
+    delta[CATEGORIES] = delta[CATEGORIES].mul(signs, axis=0)
+    delta['rows'] = signs
+
+    updated = {}
+    for name, frame in frames.items():
+        keys = ROLLUPS[name][1]
+        combined = pd.concat([frame, delta[keys + ['rows'] + CATEGORIES]], ignore_index=True)
+        combined = _sum(combined.astype(_key_dtypes(frame, combined, keys)), keys).reset_index()
+        combined = combined[combined['rows'] > 0].reset_index(drop=True)
+        unused = {key: combined[key].cat.remove_unused_categories()
+                  for key in keys if isinstance(combined[key].dtype, pd.CategoricalDtype)}
+        updated[name] = combined.assign(**unused)
+    return updated
+
+
+# Function to get a rollup, rebuilding it only when its dataset changed elsewhere
+def get(name):
+    dataset = ROLLUPS[name][0]
+    version = data_store.data_version(dataset)
+    with _lock:
+        entry = _rollups.get(dataset)
+        profiler.count('rollups.miss' if entry is None or entry[0] != version else 'rollups.hit')
+        if entry is None or entry[0] != version:
+            entry = (version, _load(dataset, version))
+            _rollups[dataset] = entry
+    return entry[1][name].copy()
+
+
+# Keep materialized rollups in step with records written in this process
+@data_store.on_write
+def _record_written(dataset, old_row, new_row, before, after):
+    with _lock:
+        entry = _rollups.get(dataset)
+        if entry is None:
+            return
+        if before is None or entry[0] != before:
+            del _rollups[dataset]
+            return
+        _rollups[dataset] = (after, _apply(entry[1], dataset, old_row, new_row))
+
+
+# Drop the rollups of a dataset changed by another process
+@shared_cache.subscribe
+def _changed_elsewhere(dataset, version):
+    with _lock:
+        _rollups.pop(dataset, None)
+
+
+# Yearly totals per category for the monthly dashboard filters
+def yearly(filters):
+    filters = data_store.active_filters(filters)
+    if 'Bulan' in filters:
+        return monthly(filters).groupby('Tahun')[CATEGORIES].sum().reset_index()
+    return data_store.filter_frame(get('tahunan'), filters)
+
+
+# Monthly totals per category for the monthly dashboard filters
+def monthly(filters):
+    return data_store.filter_frame(get('bulanan'), data_store.active_filters(filters))
+
+
+# Totals per category and location (as index) for the daily dashboard filters
+def location_totals(filters):
+    filters = data_store.active_filters(filters)
+    if 'Tanggal' in filters:
+        frame = data_store.filter_frame(get('lokasi_harian'), filters)
+        return frame.groupby('Lokasi', observed=True)[CATEGORIES].sum()
+    return data_store.filter_frame(get('lokasi'), filters).set_index('Lokasi')[CATEGORIES]
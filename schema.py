@@ -0,0 +1,60 @@
+import numpy as np
+import pandas as pd
+
+import kalender
+import storage
+
+
+# Columns held as categoricals in memory
+CATEGORICAL = {
+    'bulanan': ['Bulan'],
+    'harian': ['Lokasi'],
+}
+
+
+def memory_bytes(df):
+    return int(df.memory_usage(deep=True).sum())
+
+
+# Smallest dtype holding every value: unsigned/signed ints for whole numbers,
+# float32 when there are gaps or fractions
+def _compact_numeric(values):
+    values = pd.to_numeric(values)
+    if values.isna().any() or not np.array_equal(values, values.round()):
+        return values.astype(np.float32)
+    values = values.astype(np.int64)
+    if (values >= 0).all():
+        return pd.to_numeric(values, downcast='unsigned')
+    return pd.to_numeric(values, downcast='integer')
+
+
+def _categorical(column, values):
+    if column == 'Bulan':
+        # Month names present in the data, in calendar order
+        present = values.dropna().unique()
+        order = kalender.month_numbers(present).argsort(kind='stable')
+        return pd.Categorical(values, categories=present[order], ordered=True)
+    return values.astype('category')
+
+
+# Function to validate and convert Tanggal to datetime64, rejecting bad dates
+def _datetime(values):
+    parsed = pd.to_datetime(values, format='ISO8601', errors='coerce')
+    invalid = parsed.isna() & values.notna()
+    if invalid.any():
+        raise ValueError(f"Invalid Tanggal value(s): {list(values[invalid].head(5))}")
+    return parsed
+
+
+# Function to apply the in-memory schema of a dataset: categoricals, the
+# smallest numeric types and a validated Tanggal
+def compact(dataset, df):
+    df = df.copy()
+    for column in df.columns:
+        if column in CATEGORICAL[dataset]:
+            df[column] = _categorical(column, df[column])
+        elif column == 'Tanggal':
+            df[column] = _datetime(df[column])
+        elif column == 'Tahun' or column in storage.MEASURES:
+            df[column] = _compact_numeric(df[column])
+    return df
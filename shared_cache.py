@@ -0,0 +1,250 @@
+import hashlib
+import json
+import os
+import threading
+import time
+
+import pyarrow as pa
+
+import journal
+
+try:
+    import redis
+except ImportError:  # optional: without it only the shared directory store is available
+    redis = None
+
+
+# Cross-process tier for parsed datasets, rollups and forecasts, so several
+# Streamlit processes or replicas compute them once instead of once each:
+#
+#   SMARTWASTE_SHARED_DIR=/dev/shm/smartwaste   Arrow files memory-mapped by
+#                                               every process on this host
+#   SMARTWASTE_REDIS_URL=redis://host:6379/0    Redis (or any server speaking
+#                                               its protocol), for replicas
+#
+# Without either setting nothing is shared and the process-wide caches work
+# as before. Entries are tagged with the data version they were computed
+# from, so a stale entry is never returned; writes are also published so
+# other processes drop their own copies right away.
+
+SHARED_DIR = os.environ.get('SMARTWASTE_SHARED_DIR')
+REDIS_URL = os.environ.get('SMARTWASTE_REDIS_URL')
+# Redis key prefix and invalidation channel
+PREFIX = 'smartwaste'
+CHANNEL = f'{PREFIX}:invalidate'
+# Seconds between checks of the shared directory's event log
+POLL_SECONDS = 1.0
+# Size at which the event log is rotated, and the recent messages kept
+EVENTS_MAX_BYTES = 256 * 1024
+EVENTS_KEEP = 100
+
+VERSION_KEY = b'smartwaste_version'
+
+_store = None
+_store_lock = threading.Lock()
+_subscribers = []
+_listener = None
+# Tells this process' own messages apart from other processes'
+_origin = f'{os.getpid()}-{time.time_ns()}'
+
+
+def _digest(value):
+    return hashlib.sha1(json.dumps(value, default=str).encode('utf-8')).hexdigest()[:20]
+
+
+def _to_ipc(df, version):
+    table = pa.Table.from_pandas(df)
+    metadata = {**(table.schema.metadata or {}), VERSION_KEY: _digest(version).encode()}
+    table = table.replace_schema_metadata(metadata)
+    sink = pa.BufferOutputStream()
+    with pa.ipc.new_file(sink, table.schema) as writer:
+        writer.write_table(table)
+    return sink.getvalue()
+
+
+def _from_ipc(source, version):
+    reader = pa.ipc.open_file(source)
+    if (reader.schema.metadata or {}).get(VERSION_KEY) != _digest(version).encode():
+        return None
+    # Numeric columns stay views of the shared buffer where possible
+    return reader.read_all().to_pandas(split_blocks=True)
+
+
+# Function to get a frame whose columns are read-only views of Arrow memory,
+# as frames read from the shared tier are, so it can be handed out uncopied
+def read_only(df):
+    return pa.Table.from_pandas(df).to_pandas(split_blocks=True)
+
+
+# Arrow files in a directory, ideally on tmpfs. Readers map them, so the
+# operating system keeps a single copy in memory for all processes.
+class DirectoryStore:
+    name = 'directory'
+
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self.events = os.path.join(directory, 'events.jsonl')
+
+    def path(self, namespace, key):
+        return os.path.join(self.directory, f"{namespace}-{_digest(key)}.arrow")
+
+    def get(self, namespace, key, version):
+        try:
+            source = pa.memory_map(self.path(namespace, key))
+        except FileNotFoundError:
+            return None
+        return _from_ipc(source, version)
+
+    # Written beside the target and renamed, so readers never see a partial
+    # file; mappings of the replaced file stay valid until they are dropped
+    def put(self, namespace, key, version, df):
+        path = self.path(namespace, key)
+        tmp_path = f"{path}.{_origin}.tmp"
+        with open(tmp_path, 'wb') as file:
+            file.write(_to_ipc(df, version))
+        os.replace(tmp_path, path)
+
+    # A new event log, starting with a line naming it so listeners notice
+    # the log was replaced
+    def _start_events(self, lines):
+        tmp_path = f"{self.events}.{_origin}.tmp"
+        with open(tmp_path, 'w', encoding='utf-8') as file:
+            file.write(json.dumps({'log': f'{_origin}-{time.time_ns()}'}) + '\n')
+            file.writelines(lines)
+        os.replace(tmp_path, self.events)
+
+    # Appended under a lock; past EVENTS_MAX_BYTES the log is replaced by one
+    # holding only the most recent messages
+    def publish(self, message):
+        with journal.lock_file(f"{self.events}.lock", exclusive=True):
+            if not os.path.exists(self.events):
+                self._start_events([])
+            with open(self.events, 'a', encoding='utf-8') as file:
+                file.write(json.dumps(message) + '\n')
+                size = file.tell()
+            if size > EVENTS_MAX_BYTES:
+                with open(self.events, encoding='utf-8') as file:
+                    self._start_events(file.readlines()[1:][-EVENTS_KEEP:])
+
+    def listen(self, deliver):
+        header, position = None, 0
+        if os.path.exists(self.events):
+            with open(self.events, encoding='utf-8') as file:
+                header = file.readline()
+            position = os.path.getsize(self.events)
+        while True:
+            time.sleep(POLL_SECONDS)
+            try:
+                file = open(self.events, encoding='utf-8')
+            except FileNotFoundError:
+                continue
+            with file:
+                # A replaced log is read from its start; the messages it kept
+                # may be delivered twice, which only drops a cache once more
+                first = file.readline()
+                if not first.endswith('\n'):
+                    continue
+                if first != header:
+                    header, position = first, len(first.encode('utf-8'))
+                file.seek(position)
+                for line in file:
+                    if not line.endswith('\n'):
+                        break
+                    position += len(line.encode('utf-8'))
+                    deliver(json.loads(line))
+
+
+# One Redis key per entry holding the Arrow file; invalidation over pub/sub
+class RedisStore:
+    name = 'redis'
+
+    def __init__(self, url):
+        self.client = redis.Redis.from_url(url)
+
+    def key(self, namespace, key):
+        return f"{PREFIX}:{namespace}:{_digest(key)}"
+
+    def get(self, namespace, key, version):
+        data = self.client.get(self.key(namespace, key))
+        if data is None:
+            return None
+        return _from_ipc(pa.BufferReader(data), version)
+
+    # A new version replaces the old one
+    def put(self, namespace, key, version, df):
+        self.client.set(self.key(namespace, key), _to_ipc(df, version).to_pybytes())
+
+    def publish(self, message):
+        self.client.publish(CHANNEL, json.dumps(message))
+
+    def listen(self, deliver):
+        pubsub = self.client.pubsub(ignore_subscribe_messages=True)
+        pubsub.subscribe(CHANNEL)
+        for message in pubsub.listen():
+            deliver(json.loads(message['data']))
+
+
+# Store configured by the environment, or None when nothing is shared
+def get_store():
+    global _store
+    with _store_lock:
+        if _store is None:
+            if REDIS_URL:
+                if redis is None:
+                    raise RuntimeError("SMARTWASTE_REDIS_URL is set but the redis package is not installed")
+                _store = RedisStore(REDIS_URL)
+            elif SHARED_DIR:
+                _store = DirectoryStore(SHARED_DIR)
+    return _store
+
+
+# Function to get a shared frame computed from this data version, or None
+def get_frame(namespace, key, version):
+    store = get_store()
+    if store is None:
+        return None
+    return store.get(namespace, key, version)
+
+
+def put_frame(namespace, key, version, df):
+    store = get_store()
+    if store is not None:
+        store.put(namespace, key, version, df)
+    return df
+
+
+def _deliver(message):
+    if message.get('origin') == _origin:
+        return
+    for callback in list(_subscribers):
+        callback(message['dataset'], message['version'])
+
+
+def _listen(store):
+    # Reconnect after errors, e.g. a Redis restart
+    while True:
+        try:
+            store.listen(_deliver)
+        except Exception:
+            time.sleep(POLL_SECONDS)
+
+
+# Function to tell every other process that a dataset changed
+def publish(dataset, version):
+    store = get_store()
+    if store is not None:
+        store.publish({'dataset': dataset, 'version': version, 'origin': _origin})
+
+
+# Register callback(dataset, version), called from a background thread when
+# another process publishes a change
+def subscribe(callback):
+    global _listener
+    _subscribers.append(callback)
+    store = get_store()
+    with _store_lock:
+        if store is not None and _listener is None:
+            _listener = threading.Thread(target=_listen, args=(store,), name='shared-cache', daemon=True)
+            _listener.start()
+    return callback
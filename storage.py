@@ -0,0 +1,475 @@
+import argparse
+import contextlib
+import datetime
+import os
+import sqlite3
+import tempfile
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import kalender
+import profiler
+
+
+# Legacy files, now only used for import and export
+LEGACY_PATHS = {
+    'bulanan': "Data/Laporan-hasil-Rumah-Kompos-gabungan.xlsx",
+    'harian': "Data/Laporan hasil Rumah Kompos gabungan harian.csv",
+}
+PARQUET_PATHS = {
+    'bulanan': "Data/bulanan.parquet",
+    'harian': "Data/harian.parquet",
+}
+SQLITE_PATH = "Data/smartwaste.db"
+
+MEASURES = ['Sampah Daun', 'Sampah Sayuran', 'Sampah Anorganik', 'Daun Terolah', 'Sampah Fermentasi', 'Kompos Jadi']
+
+# Typed columns of each normalized dataset
+SCHEMAS = {
+    'bulanan': pa.schema(
+        [('Tahun', pa.int32()), ('Bulan', pa.string())] + [(column, pa.int64()) for column in MEASURES]
+    ),
+    'harian': pa.schema(
+        [('Tanggal', pa.timestamp('ns'))] + [(column, pa.int64()) for column in MEASURES] + [('Lokasi', pa.string())]
+    ),
+}
+
+# pandas dtypes of a dataset's typed schema
+def pandas_dtypes(dataset):
+    return SCHEMAS[dataset].empty_table().to_pandas().dtypes.to_dict()
+
+
+# Indexes of each table in the SQLite backend, matching the dashboard filters
+SQLITE_INDEXES = {
+    'bulanan': [('Tahun', 'Bulan'), ('Bulan',)],
+    'harian': [('Tanggal',), ('Lokasi', 'Tanggal')],
+}
+
+
+# Function to normalize the monthly report as read from Excel/CSV
+def normalize_bulanan(df):
+    # Konversi kolom Tahun ke tipe data datetime, tampilkan hanya tahun saja
+    df['Tahun'] = pd.to_datetime(df['Tahun'].astype(str), format='%Y').dt.year
+    return df
+
+
+# Tanggal as written in the legacy daily CSV, time of day included even at midnight
+LEGACY_DATE_FORMAT = '%Y-%m-%d %H:%M:%S'
+
+# Lokasi names as written in the compost house logs -> names used here
+LOKASI_NAMES = {'Kompos Pasar Kendal': 'Pasar Kendal', 'Kompos Jatirejo': 'Jatirejo'}
+
+
+# Function to normalize the daily log as read from Excel/CSV
+def normalize_harian(df):
+    # Ubah kolom 'Tanggal' menjadi datetime; tanggal dengan atau tanpa jam
+    df['Tanggal'] = pd.to_datetime(df['Tanggal'], format='ISO8601')
+
+    # Hapus kolom 'Bulan' dan 'Tahun'
+    df = df.drop(columns=['Bulan', 'Tahun'], errors='ignore')
+
+    # Ubah nama kolom 'Kompos' menjadi 'Lokasi'
+    df = df.rename(columns={'Kompos': 'Lokasi'})
+
+    # Ganti nilai 'Kompos Pasar Kendal' menjadi 'Pasar Kendal' dan 'Kompos Jatirejo' menjadi 'Jatirejo'
+    df['Lokasi'] = df['Lokasi'].replace(LOKASI_NAMES)
+    return df
+
+
+NORMALIZERS = {'bulanan': normalize_bulanan, 'harian': normalize_harian}
+
+
+# Function to turn the daily dataset back into the column layout of the
+# legacy CSV (Bulan, Tahun and Kompos), so writing it keeps the file's format
+def denormalize_harian(df):
+    tanggal = pd.to_datetime(df['Tanggal'])
+    legacy = df[['Tanggal'] + MEASURES].copy()
+    legacy['Bulan'] = np.array(kalender.BULAN, dtype=object)[tanggal.dt.month.to_numpy() - 1]
+    legacy['Tahun'] = tanggal.dt.year.to_numpy()
+    # Both spellings of a location are read as one name; the short one is written
+    legacy['Kompos'] = df['Lokasi'].astype(object).to_numpy()
+    return legacy
+
+
+DENORMALIZERS = {'harian': denormalize_harian}
+
+
+# Function to import an Excel/CSV/Parquet file as a normalized dataset
+def import_file(dataset, path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension == '.parquet':
+        return pd.read_parquet(path)
+    if extension in ('.xlsx', '.xls'):
+        with profiler.stage('parse excel'):
+            df = pd.read_excel(path)
+    elif extension == '.csv':
+        with profiler.stage('parse csv'):
+            df = pd.read_csv(path)
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+    return NORMALIZERS[dataset](df)
+
+
+# Function to export a dataset to Excel/CSV/Parquet, chosen by file extension
+def export_file(df, path):
+    extension = os.path.splitext(path)[1].lower()
+    if extension in ('.xlsx', '.xls'):
+        df.to_excel(path, index=False)
+    elif extension == '.csv':
+        df.to_csv(path, index=False, date_format=LEGACY_DATE_FORMAT)
+    elif extension == '.parquet':
+        df.to_parquet(path, index=False)
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+
+
+# Replace path atomically so readers never see a half-written file
+def _atomic_write(path, write):
+    directory = os.path.dirname(path) or '.'
+    fd, tmp_path = tempfile.mkstemp(dir=directory, prefix='.tmp-', suffix=os.path.splitext(path)[1])
+    os.close(fd)
+    try:
+        write(tmp_path)
+        os.replace(tmp_path, path)
+    except BaseException:
+        if os.path.exists(tmp_path):
+            os.remove(tmp_path)
+        raise
+
+
+# Legacy backend: the original Excel/CSV files are the system of record
+class ExcelBackend:
+    name = 'excel'
+
+    def path(self, dataset):
+        return LEGACY_PATHS[dataset]
+
+    def read(self, dataset):
+        return import_file(dataset, self.path(dataset))
+
+    def write(self, dataset, df):
+        df = DENORMALIZERS.get(dataset, lambda df: df)(df)
+        _atomic_write(self.path(dataset), lambda tmp_path: export_file(df, tmp_path))
+
+    # Next free record ID; the base table is always indexed 0..n-1
+    def next_id(self, dataset):
+        return len(self.read(dataset))
+
+    # Only the requested columns are parsed from the daily CSV
+    def read_columns(self, dataset, columns):
+        if dataset != 'harian':
+            return self.read(dataset)[columns]
+        legacy = {'Lokasi': 'Kompos'}
+        df = pd.read_csv(self.path(dataset), usecols=[legacy.get(column, column) for column in columns])
+        df = df.rename(columns={'Kompos': 'Lokasi'})
+        if 'Tanggal' in df:
+            df['Tanggal'] = pd.to_datetime(df['Tanggal'], format='ISO8601')
+        if 'Lokasi' in df:
+            df['Lokasi'] = df['Lokasi'].replace(LOKASI_NAMES)
+        return df[columns]
+
+    # New daily rows are appended to the CSV in its own layout, without
+    # reading the history. The Excel workbook is rewritten whole.
+    def append(self, dataset, chunks):
+        if dataset != 'harian':
+            chunks = list(chunks)
+            if not chunks:
+                return 0
+            added = pd.concat(chunks, ignore_index=True)
+            self.write(dataset, pd.concat([self.read(dataset), added], ignore_index=True))
+            return len(added)
+
+        added = 0
+        with open(self.path(dataset), 'a', encoding='utf-8', newline='') as file:
+            for chunk in chunks:
+                denormalize_harian(chunk).to_csv(file, header=False, index=False, lineterminator='\n',
+                                                 date_format=LEGACY_DATE_FORMAT)
+                added += len(chunk)
+        return added
+
+
+# Columnar backend: typed Parquet files, memory-mapped on read
+class ParquetBackend:
+    name = 'parquet'
+
+    def __init__(self, memory_map=True):
+        self.memory_map = memory_map
+
+    def path(self, dataset):
+        return PARQUET_PATHS[dataset]
+
+    def read(self, dataset):
+        with profiler.stage('read parquet'):
+            table = pq.read_table(self.path(dataset), memory_map=self.memory_map)
+            return table.to_pandas()
+
+    def write(self, dataset, df):
+        schema = SCHEMAS[dataset]
+        table = pa.Table.from_pandas(df[schema.names], schema=schema, preserve_index=False)
+        _atomic_write(self.path(dataset), lambda tmp_path: pq.write_table(table, tmp_path))
+
+    # Row count from the file footer, without reading any column
+    def next_id(self, dataset):
+        return pq.ParquetFile(self.path(dataset)).metadata.num_rows
+
+    def read_columns(self, dataset, columns):
+        return pq.read_table(self.path(dataset), columns=columns, memory_map=self.memory_map).to_pandas()
+
+    # Parquet files are immutable: existing row groups are copied batch by
+    # batch into a new file followed by the chunks, so neither the history nor
+    # the import is ever held in memory as a whole
+    def append(self, dataset, chunks):
+        schema = SCHEMAS[dataset]
+        path = self.path(dataset)
+        added = 0
+
+        def write(tmp_path):
+            nonlocal added
+            with pq.ParquetWriter(tmp_path, schema) as writer:
+                for batch in pq.ParquetFile(path, memory_map=self.memory_map).iter_batches():
+                    writer.write_table(pa.Table.from_batches([batch]).cast(schema))
+                for chunk in chunks:
+                    writer.write_table(pa.Table.from_pandas(chunk[schema.names], schema=schema, preserve_index=False))
+                    added += len(chunk)
+        _atomic_write(path, write)
+        return added
+
+
+def _quote(column):
+    return '"' + column.replace('"', '""') + '"'
+
+
+def _sql_type(field):
+    return 'INTEGER' if pa.types.is_integer(field.type) else 'TEXT'
+
+
+# WHERE clause for {column: values} (IN) and {column: date} (whole day) filters
+def _where(filters):
+    clauses, params = [], []
+    for column, value in (filters or {}).items():
+        if isinstance(value, datetime.date):
+            start = pd.Timestamp(value)
+            clauses.append(f"{_quote(column)} >= ? AND {_quote(column)} < ?")
+            params += [str(start), str(start + pd.Timedelta(days=1))]
+        else:
+            values = list(value)
+            clauses.append(f"{_quote(column)} IN ({', '.join('?' * len(values))})")
+            params += [item.item() if hasattr(item, 'item') else item for item in values]
+    return (' WHERE ' + ' AND '.join(clauses) if clauses else ''), params
+
+
+# Embedded SQL backend: one indexed table per dataset, filters run in SQLite
+class SQLiteBackend:
+    name = 'sqlite'
+
+    def path(self, dataset):
+        return SQLITE_PATH
+
+    @contextlib.contextmanager
+    def _connect(self):
+        connection = sqlite3.connect(SQLITE_PATH)
+        try:
+            with connection:
+                yield connection
+        finally:
+            connection.close()
+
+    # Counter per table, raised in the transaction of every write, so a change
+    # to one dataset leaves the other's version (and caches) alone
+    def _bump(self, connection, dataset):
+        connection.execute("CREATE TABLE IF NOT EXISTS data_versions (dataset TEXT PRIMARY KEY, version INTEGER NOT NULL)")
+        connection.execute(
+            "INSERT INTO data_versions VALUES (?, 1) ON CONFLICT (dataset) DO UPDATE SET version = version + 1",
+            (dataset,),
+        )
+
+    def version(self, dataset):
+        with self._connect() as connection:
+            try:
+                row = connection.execute("SELECT version FROM data_versions WHERE dataset = ?", (dataset,)).fetchone()
+            except sqlite3.OperationalError:  # written before versions were kept
+                row = None
+        return 0 if row is None else row[0]
+
+    # Restore the pandas dtypes of the typed schema
+    def _typed(self, dataset, df):
+        df.index.name = None
+        return df.astype(pandas_dtypes(dataset))
+
+    def read(self, dataset):
+        return self.query(dataset)
+
+    # Rows matching filters, materializing only those rows
+    def query(self, dataset, filters=None):
+        where, params = _where(filters)
+        sql = f"SELECT * FROM {dataset}{where} ORDER BY id"
+        with profiler.stage('sqlite query'), self._connect() as connection:
+            df = pd.read_sql_query(sql, connection, params=params, index_col='id')
+        return self._typed(dataset, df)
+
+    # Distinct values of a column in order of first appearance, like Series.unique()
+    def distinct(self, dataset, column):
+        sql = f"SELECT {_quote(column)} FROM {dataset} GROUP BY {_quote(column)} ORDER BY MIN(id)"
+        with self._connect() as connection:
+            values = [row[0] for row in connection.execute(sql)]
+        return pd.Series(values, dtype=pandas_dtypes(dataset)[column]).unique()
+
+    def value_range(self, dataset, column):
+        sql = f"SELECT MIN({_quote(column)}), MAX({_quote(column)}) FROM {dataset}"
+        with self._connect() as connection:
+            low, high = connection.execute(sql).fetchone()
+        if pa.types.is_timestamp(SCHEMAS[dataset].field(column).type) and low is not None:
+            low, high = pd.Timestamp(low), pd.Timestamp(high)
+        return low, high
+
+    # Sums of the measures per key, with a 'rows' count, grouped in SQLite.
+    # expressions gives the SQL of keys derived from other columns.
+    def aggregate(self, dataset, keys, expressions=None):
+        expressions = expressions or {}
+        selected = [f"{expressions.get(key, _quote(key))} AS {_quote(key)}" for key in keys]
+        sums = [f"SUM({_quote(column)}) AS {_quote(column)}" for column in MEASURES]
+        positions = ', '.join(str(position) for position in range(1, len(keys) + 1))
+        sql = f"SELECT {', '.join(selected)}, COUNT(*) AS \"rows\", {', '.join(sums)} FROM {dataset} GROUP BY {positions}"
+        with profiler.stage('sqlite aggregate'), self._connect() as connection:
+            return pd.read_sql_query(sql, connection)
+
+    def write(self, dataset, df):
+        schema = SCHEMAS[dataset]
+        columns = ', '.join(f"{_quote(field.name)} {_sql_type(field)}" for field in schema)
+        rows = self._rows(dataset, df)
+        with self._connect() as connection:
+            connection.execute(f"DROP TABLE IF EXISTS {dataset}")
+            connection.execute(f"CREATE TABLE {dataset} (id INTEGER PRIMARY KEY, {columns})")
+            for index_columns in SQLITE_INDEXES[dataset]:
+                name = f"idx_{dataset}_" + '_'.join(column.lower() for column in index_columns)
+                connection.execute(f"CREATE INDEX {name} ON {dataset} ({', '.join(map(_quote, index_columns))})")
+            connection.executemany(self._insert_sql(dataset), rows)
+            self._bump(connection, dataset)
+
+    def _rows(self, dataset, df):
+        df = df[SCHEMAS[dataset].names].reset_index(drop=True)
+        for field in SCHEMAS[dataset]:
+            if pa.types.is_timestamp(field.type):
+                df[field.name] = df[field.name].dt.strftime('%Y-%m-%d %H:%M:%S')
+        return [(int(record_id),) + tuple(row) for record_id, row in zip(df.index, df.itertuples(index=False))]
+
+    def _insert_sql(self, dataset):
+        names = ['id'] + SCHEMAS[dataset].names
+        return f"INSERT INTO {dataset} ({', '.join(map(_quote, names))}) VALUES ({', '.join('?' * len(names))})"
+
+    def next_id(self, dataset):
+        with self._connect() as connection:
+            return self._next_id(connection, dataset)
+
+    def _next_id(self, connection, dataset):
+        (last_id,) = connection.execute(f"SELECT MAX(id) FROM {dataset}").fetchone()
+        return 0 if last_id is None else last_id + 1
+
+    def read_columns(self, dataset, columns):
+        sql = f"SELECT {', '.join(map(_quote, columns))} FROM {dataset} ORDER BY id"
+        with self._connect() as connection:
+            df = pd.read_sql_query(sql, connection)
+        return df.astype({column: pandas_dtypes(dataset)[column] for column in columns})
+
+    # All chunks are inserted in one transaction
+    def append(self, dataset, chunks):
+        added = 0
+        with self._connect() as connection:
+            first_id = self._next_id(connection, dataset)
+            for chunk in chunks:
+                rows = self._rows(dataset, chunk)
+                connection.executemany(self._insert_sql(dataset), [
+                    (first_id + added + position,) + row[1:] for position, row in enumerate(rows)
+                ])
+                added += len(rows)
+            self._bump(connection, dataset)
+        return added
+
+    # Apply one journal entry directly as a small transaction
+    def apply(self, dataset, entry):
+        with self._connect() as connection:
+            self._bump(connection, dataset)
+            if entry['op'] == 'delete':
+                connection.execute(f"DELETE FROM {dataset} WHERE id = ?", (entry['id'],))
+                return
+            row = self._rows(dataset, pd.DataFrame([entry['record']], index=[entry['id']]))[0]
+            row = (entry['id'],) + row[1:]
+            if entry['op'] == 'add':
+                connection.execute(self._insert_sql(dataset), row)
+            else:
+                assignments = ', '.join(f"{_quote(name)} = ?" for name in SCHEMAS[dataset].names)
+                connection.execute(f"UPDATE {dataset} SET {assignments} WHERE id = ?", row[1:] + row[:1])
+
+
+BACKENDS = {'excel': ExcelBackend, 'parquet': ParquetBackend, 'sqlite': SQLiteBackend}
+
+
+# Backend chosen with SMARTWASTE_STORAGE, or Parquet once the data has been migrated
+def get_backend():
+    name = os.environ.get('SMARTWASTE_STORAGE')
+    if name is None:
+        migrated = all(os.path.exists(path) for path in PARQUET_PATHS.values())
+        name = 'parquet' if migrated else 'excel'
+    if name not in BACKENDS:
+        raise ValueError(f"Unknown storage backend: {name}")
+    return BACKENDS[name]()
+
+
+# One-shot conversion of the legacy Data/ files into a Parquet or SQLite backend
+def migrate(backend_name='parquet', force=False):
+    backend = BACKENDS[backend_name]()
+    for dataset, legacy_path in LEGACY_PATHS.items():
+        target = backend.path(dataset)
+        if backend_name == 'sqlite':
+            exists = _sqlite_has_table(dataset)
+        else:
+            exists = os.path.exists(target)
+        if exists and not force:
+            print(f"{dataset} already exists in {target}, skipping (use --force to overwrite)")
+            continue
+        df = import_file(dataset, legacy_path)
+        backend.write(dataset, df)
+        print(f"{legacy_path} -> {target} ({len(df)} rows)")
+
+
+def _sqlite_has_table(dataset):
+    if not os.path.exists(SQLITE_PATH):
+        return False
+    with contextlib.closing(sqlite3.connect(SQLITE_PATH)) as connection:
+        sql = "SELECT 1 FROM sqlite_master WHERE type = 'table' AND name = ?"
+        return connection.execute(sql, (dataset,)).fetchone() is not None
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Smart waste data storage')
+    subparsers = parser.add_subparsers(dest='command', required=True)
+
+    migrate_parser = subparsers.add_parser('migrate', help='convert the legacy Data/ files to Parquet or SQLite')
+    migrate_parser.add_argument('--backend', choices=['parquet', 'sqlite'], default='parquet')
+    migrate_parser.add_argument('--force', action='store_true', help='overwrite existing data in the target backend')
+
+    export_parser = subparsers.add_parser('export', help='export a dataset to .xlsx, .csv or .parquet')
+    export_parser.add_argument('dataset', choices=sorted(SCHEMAS))
+    export_parser.add_argument('path')
+
+    import_parser = subparsers.add_parser('import', help='replace a dataset with an .xlsx, .csv or .parquet file')
+    import_parser.add_argument('dataset', choices=sorted(SCHEMAS))
+    import_parser.add_argument('path')
+
+    # Imported here, journal builds on this module
+    import journal
+
+    args = parser.parse_args()
+    if args.command == 'migrate':
+        migrate(args.backend, force=args.force)
+    elif args.command == 'export':
+        export_file(journal.snapshot(args.dataset), args.path)
+    elif args.command == 'import':
+        journal.replace(args.dataset, import_file(args.dataset, args.path))
+
+
+if __name__ == '__main__':
+    main()
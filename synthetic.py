@@ -0,0 +1,182 @@
+import argparse
+import json
+import os
+import threading
+import time
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+import data_store
+import storage
+
+try:
+    import h5py
+except ImportError:  # optional: without it only the bootstrap generator is available
+    h5py = None
+
+
+# Synthetic daily records for load testing, in the 'harian' schema
+
+GAN_PATH = os.path.join("Model", "GAN_model.h5")
+# Generator outputs, scaled to [0, 1] (sigmoid), in this column order
+GAN_COLUMNS = ['Sampah Daun', 'Sampah Sayuran', 'Sampah Fermentasi', 'Daun Terolah', 'Kompos Jadi']
+# Rows run through the generator at once; keeps its 512-wide hidden layer small
+GAN_BATCH = 8192
+
+ACTIVATIONS = {
+    'relu': lambda x: np.maximum(x, 0),
+    'sigmoid': lambda x: 1 / (1 + np.exp(-x)),
+    'tanh': np.tanh,
+    'linear': lambda x: x,
+}
+
+_generator = None
+_generator_lock = threading.Lock()
+
+
+def _read_generator(path):
+    # Dense layers of the Keras model as (kernel, bias, activation), run with NumPy
+    with h5py.File(path, 'r') as file:
+        config = json.loads(file.attrs['model_config'])
+        activations = {
+            layer['config']['name']: layer['config']['activation']
+            for layer in config['config']['layers'] if layer['class_name'] == 'Dense'
+        }
+        weights = file['model_weights']
+        layers = []
+        for name in weights.attrs['layer_names']:
+            name = name.decode() if isinstance(name, bytes) else name
+            group = weights[name]
+            kernel_name, bias_name = group.attrs['weight_names']
+            layers.append((group[kernel_name][()], group[bias_name][()], ACTIVATIONS[activations[name]]))
+    return layers
+
+
+# Function to load the GAN generator once per process, or None when h5py or
+# the model file is missing
+def load_generator(path=GAN_PATH):
+    global _generator
+    if h5py is None or not os.path.exists(path):
+        return None
+    with _generator_lock:
+        if _generator is None:
+            _generator = _read_generator(path)
+    return _generator
+
+
+# Per-location profile of the real daily data: its rows (for the bootstrap)
+# and sorted columns (to map the GAN outputs onto real kilograms)
+def profiles(df=None):
+    df = data_store.load_harian() if df is None else df
+    result = {}
+    for location, rows in df.groupby('Lokasi', observed=True):
+        values = rows[storage.MEASURES].to_numpy(dtype=np.float64)
+        result[location] = {
+            'rows': values,
+            'sorted': np.sort(values, axis=0),
+        }
+    return result
+
+
+def _bootstrap_batch(profile, rng, n):
+    return profile['rows'][rng.integers(0, len(profile['rows']), n)]
+
+
+def _gan_batch(generator, profile, rng, n):
+    outputs = np.empty((n, len(GAN_COLUMNS)), dtype=np.float32)
+    for offset in range(0, n, GAN_BATCH):
+        size = min(GAN_BATCH, n - offset)
+        x = rng.standard_normal((size, generator[0][0].shape[0]), dtype=np.float32)
+        for kernel, bias, activation in generator:
+            x = activation(x @ kernel + bias)
+        outputs[offset:offset + size] = x
+
+    # The generator's scaling is not stored with it: each output is mapped by
+    # rank onto the real values of the location, which keeps the GAN's joint
+    # structure with realistic kilograms. Other columns are bootstrapped.
+    values = _bootstrap_batch(profile, rng, n)
+    ranks = outputs.argsort(axis=0, kind='stable').argsort(axis=0, kind='stable')
+    for position, column in enumerate(GAN_COLUMNS):
+        real = profile['sorted'][:, storage.MEASURES.index(column)]
+        values[:, storage.MEASURES.index(column)] = real[ranks[:, position] * len(real) // n]
+    return values
+
+
+# Function to generate rows_per_location records per location in chunks of at
+# most chunk_rows, spread evenly over `days` days from `start`. Memory use is
+# bounded by the chunk size. Locations not in the real data reuse the profile
+# of a real one.
+def generate(rows_per_location, locations=None, chunk_rows=100_000, days=3650,
+             start='2024-01-01', method='auto', seed=0, df=None):
+    real = profiles(df)
+    locations = list(real) if locations is None else list(locations)
+    generator = load_generator() if method in ('auto', 'gan') else None
+    if method == 'gan' and generator is None:
+        raise RuntimeError(f"GAN generator unavailable (needs h5py and {GAN_PATH})")
+
+    rng = np.random.default_rng(seed)
+    start = pd.Timestamp(start).to_datetime64().astype('datetime64[s]')
+    real_names = list(real)
+    for number, location in enumerate(locations):
+        profile = real.get(location, real[real_names[number % len(real_names)]])
+        for offset in range(0, rows_per_location, chunk_rows):
+            n = min(chunk_rows, rows_per_location - offset)
+            if generator is not None:
+                values = _gan_batch(generator, profile, rng, n)
+            else:
+                values = _bootstrap_batch(profile, rng, n)
+
+            # Evenly spread days, at a random time between 06:00 and 18:00
+            day = (np.arange(offset, offset + n, dtype=np.int64) * days) // rows_per_location
+            seconds = day * 86400 + rng.integers(6 * 3600, 18 * 3600, n)
+            chunk = pd.DataFrame(np.rint(np.maximum(values, 0)).astype(np.int64), columns=storage.MEASURES)
+            chunk.insert(0, 'Tanggal', (start + seconds).astype('datetime64[ns]'))
+            chunk['Lokasi'] = location
+            yield chunk
+
+
+# Function to stream generated chunks to a .parquet or .csv file. Returns the
+# number of rows written.
+def write(path, chunks):
+    schema = storage.SCHEMAS['harian']
+    total = 0
+    if path.endswith('.parquet'):
+        with pq.ParquetWriter(path, schema) as writer:
+            for chunk in chunks:
+                writer.write_table(pa.Table.from_pandas(chunk[schema.names], schema=schema, preserve_index=False))
+                total += len(chunk)
+    elif path.endswith('.csv'):
+        for chunk in chunks:
+            chunk.to_csv(path, mode='w' if total == 0 else 'a', header=total == 0, index=False)
+            total += len(chunk)
+    else:
+        raise ValueError(f"Unsupported file type: {path}")
+    return total
+
+
+def main():
+    parser = argparse.ArgumentParser(description='Generate synthetic daily records for load testing')
+    parser.add_argument('output', help='.parquet or .csv file to write')
+    parser.add_argument('--rows', type=int, default=1_000_000, help='records per location')
+    parser.add_argument('--locations', nargs='+', help='location names (default: the real ones)')
+    parser.add_argument('--chunk', type=int, default=100_000, help='records generated at a time')
+    parser.add_argument('--days', type=int, default=3650, help='days the records are spread over')
+    parser.add_argument('--method', choices=['auto', 'gan', 'bootstrap'], default='auto')
+    parser.add_argument('--seed', type=int, default=0)
+    args = parser.parse_args()
+
+    method = args.method
+    if method == 'auto':
+        method = 'gan' if load_generator() is not None else 'bootstrap'
+    start = time.perf_counter()
+    total = write(args.output, generate(args.rows, args.locations, args.chunk, args.days,
+                                        method=method, seed=args.seed))
+    elapsed = time.perf_counter() - start
+    print(f"{total} rows ({method}) -> {args.output} in {elapsed:.2f}s ({total / elapsed:,.0f} rows/s)")
+
+
+if __name__ == '__main__':
+    main()
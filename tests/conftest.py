@@ -0,0 +1,22 @@
+import os
+import shutil
+import sys
+
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+# The modules live at the repository root
+sys.path.insert(0, ROOT)
+
+
+# A copy of Data/ as working directory, for tests that write to the datasets
+@pytest.fixture
+def workspace(tmp_path, monkeypatch):
+    import data_store
+
+    shutil.copytree(os.path.join(ROOT, 'Data'), tmp_path / 'Data', ignore=shutil.ignore_patterns('*.lock'))
+    monkeypatch.chdir(tmp_path)
+    data_store.invalidate()
+    yield tmp_path
+    data_store.invalidate()
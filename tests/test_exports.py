@@ -0,0 +1,34 @@
+import io
+
+import pandas as pd
+import pytest
+
+import data_store
+import exports
+import storage
+
+
+@pytest.mark.parametrize('dataset, filters', [
+    ('bulanan', {}),
+    ('bulanan', {'Tahun': [2021], 'Bulan': ['March', 'April']}),
+    ('harian', {}),
+    ('harian', {'Lokasi': ['Jatirejo']}),
+])
+def test_parquet_export_sqlite(workspace, monkeypatch, dataset, filters):
+    monkeypatch.setenv('SMARTWASTE_STORAGE', 'sqlite')
+    storage.migrate('sqlite')
+    exports.clear()
+
+    data = exports.export(dataset, filters, 'parquet')
+    expected = data_store.query(dataset, filters)
+    exported = pd.read_parquet(io.BytesIO(data))
+    assert len(exported) > 0
+    pd.testing.assert_frame_equal(exported, expected, check_dtype=False, check_categorical=False)
+
+
+def test_parquet_export_small_chunks(workspace, monkeypatch):
+    monkeypatch.setenv('SMARTWASTE_STORAGE', 'sqlite')
+    storage.migrate('sqlite')
+    df = data_store.query('bulanan', {})
+    data = b''.join(exports.stream(df, 'parquet', chunk_rows=7))
+    pd.testing.assert_frame_equal(pd.read_parquet(io.BytesIO(data)), df)
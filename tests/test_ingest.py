@@ -0,0 +1,44 @@
+import pandas as pd
+
+import data_store
+import ingest
+import storage
+
+
+def _log(tanggal):
+    return pd.DataFrame({
+        'Tanggal': tanggal,
+        **{column: [10] * len(tanggal) for column in storage.MEASURES},
+        'Kompos': ['Kompos Jatirejo'] * len(tanggal),
+    })
+
+
+def test_normalize_chunk_mixed_date_formats():
+    rows, rejected = ingest.normalize_chunk(_log(['2025-02-01 09:30:00', '2025-02-02', '2025-02-03T08:00', 'kemarin']))
+    assert rows['Tanggal'].tolist() == [
+        pd.Timestamp('2025-02-01 09:30'), pd.Timestamp('2025-02-02'), pd.Timestamp('2025-02-03 08:00'),
+    ]
+    assert rows['Lokasi'].unique().tolist() == ['Jatirejo']
+    assert rejected['reason'].tolist() == ['invalid Tanggal']
+
+
+def test_import_date_only_rows_round_trip(workspace, monkeypatch):
+    monkeypatch.setenv('SMARTWASTE_STORAGE', 'excel')
+    before = data_store.load('harian')
+    path = workspace / 'import.csv'
+    _log(['2025-02-01', '2025-02-02']).to_csv(path, index=False)
+
+    report, _ = ingest.import_files([str(path)])
+    assert report['added'] == 2
+
+    # The legacy layout is kept, time of day included
+    with open(storage.LEGACY_PATHS['harian'], encoding='utf-8') as file:
+        lines = file.read().splitlines()
+    assert lines[-2:] == [
+        '2025-02-01 00:00:00,10,10,10,10,10,10,Februari,2025,Jatirejo',
+        '2025-02-02 00:00:00,10,10,10,10,10,10,Februari,2025,Jatirejo',
+    ]
+
+    after = data_store.load('harian')
+    assert len(after) == len(before) + 2
+    assert after['Tanggal'].iloc[-2:].tolist() == [pd.Timestamp('2025-02-01'), pd.Timestamp('2025-02-02')]
@@ -0,0 +1,80 @@
+import os
+
+import numpy as np
+import pandas as pd
+import pytest
+
+import kalender
+import storage
+
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+
+def test_month_numbers_full_names():
+    assert kalender.month_numbers(kalender.MONTH_NAMES).tolist() == list(range(1, 13))
+    assert kalender.month_numbers(kalender.BULAN).tolist() == list(range(1, 13))
+
+
+def test_month_numbers_abbreviations_case_and_spaces():
+    months = ['jan', 'FEB', ' Mar ', 'Mei', 'Agt', 'aug', 'Okt', 'Des', 'dec']
+    assert kalender.month_numbers(months).tolist() == [1, 2, 3, 5, 8, 8, 10, 12, 12]
+
+
+def test_month_numbers_numeric():
+    assert kalender.month_numbers([1, 6, 12]).tolist() == [1, 6, 12]
+    assert kalender.month_numbers(np.array([3, 4], dtype=np.uint8)).tolist() == [3, 4]
+
+
+def test_month_numbers_categorical():
+    months = pd.Categorical(['March', 'Januari', 'March'], categories=['March', 'Januari', 'May'])
+    assert kalender.month_numbers(months).tolist() == [3, 1, 3]
+    assert kalender.month_numbers(pd.Series(months)).tolist() == [3, 1, 3]
+
+
+def test_month_number():
+    assert kalender.month_number('Oktober') == 10
+
+
+@pytest.mark.parametrize('months', [['January', 'Smarch'], ['January', None], ['February', np.nan]])
+def test_month_numbers_unknown_or_missing(months):
+    with pytest.raises(ValueError):
+        kalender.month_numbers(months)
+
+
+def _expected_starts(years, months):
+    numbers = kalender.month_numbers(months)
+    return pd.DatetimeIndex(pd.to_datetime({'year': np.asarray(years), 'month': numbers, 'day': 1}))
+
+
+def _check(years, months):
+    expected = _expected_starts(years, months)
+    assert kalender.month_starts(years, months).equals(expected)
+    assert kalender.period_index(years, months).equals(expected.to_period('M'))
+
+
+def test_bulanan_dataset():
+    df = pd.read_excel(os.path.join(ROOT, storage.LEGACY_PATHS['bulanan']))
+    # English month names, checked against a string parse as well
+    parsed = pd.to_datetime(df['Tahun'].astype(str) + '-' + df['Bulan'] + '-01', format='%Y-%B-%d')
+    assert kalender.month_starts(df['Tahun'], df['Bulan']).equals(pd.DatetimeIndex(parsed))
+    _check(df['Tahun'], df['Bulan'])
+
+
+def test_harian_dataset():
+    df = pd.read_csv(os.path.join(ROOT, storage.LEGACY_PATHS['harian']))
+    # Indonesian month names, parsed through their position in the calendar
+    numbers = df['Bulan'].map({name: number for number, name in enumerate(kalender.BULAN, start=1)})
+    expected = pd.to_datetime({'year': df['Tahun'], 'month': numbers, 'day': 1})
+    assert kalender.month_starts(df['Tahun'], df['Bulan']).equals(pd.DatetimeIndex(expected))
+    _check(df['Tahun'], df['Bulan'])
+
+
+def test_harian_tanggal():
+    # A few logged Bulan/Tahun disagree with their Tanggal, so the names are
+    # derived from Tanggal here
+    tanggal = pd.to_datetime(pd.read_csv(os.path.join(ROOT, storage.LEGACY_PATHS['harian']))['Tanggal'])
+    years, months = tanggal.dt.year, tanggal.dt.month_name()
+    expected = pd.DatetimeIndex(tanggal.dt.to_period('M').dt.to_timestamp())
+    assert kalender.month_starts(years, months).equals(expected)
+    assert kalender.period_index(years, months).equals(pd.PeriodIndex(tanggal.dt.to_period('M')))
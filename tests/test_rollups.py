@@ -0,0 +1,72 @@
+import pandas as pd
+import pytest
+
+import data_store
+import rollups
+import storage
+
+
+def _bulanan(tahun, bulan, value):
+    return {'Tahun': tahun, 'Bulan': bulan, **{column: value for column in storage.MEASURES}}
+
+
+def _harian(tanggal, lokasi, value):
+    return {'Tanggal': pd.Timestamp(tanggal), **{column: value for column in storage.MEASURES}, 'Lokasi': lokasi}
+
+
+def _check_incremental(dataset):
+    # Updated in place by the write, not rebuilt on the next get()
+    assert rollups._rollups[dataset][0] == data_store.data_version(dataset)
+    rebuilt = rollups.build(dataset)
+    for name, frame in rebuilt.items():
+        pd.testing.assert_frame_equal(rollups.get(name), frame)
+
+
+@pytest.fixture
+def excel(workspace, monkeypatch):
+    monkeypatch.setenv('SMARTWASTE_STORAGE', 'excel')
+    with rollups._lock:
+        rollups._rollups.clear()
+
+
+def test_bulanan_writes(excel):
+    data_store.load('bulanan')
+    rollups.get('bulanan')
+    record_id = data_store.add_record('bulanan', _bulanan(2031, 'February', 7))
+    _check_incremental('bulanan')
+    # Months are still in calendar order, not alphabetical
+    assert list(rollups.get('bulanan')['Bulan'][:3]) == ['January', 'February', 'March']
+
+    data_store.load('bulanan')
+    data_store.update_record('bulanan', record_id, _bulanan(2031, 'March', 9))
+    _check_incremental('bulanan')
+
+    data_store.load('bulanan')
+    data_store.delete_record('bulanan', record_id)
+    _check_incremental('bulanan')
+
+
+def test_harian_writes(excel):
+    data_store.load('harian')
+    rollups.get('lokasi')
+    # A location not logged before becomes a new category
+    record_id = data_store.add_record('harian', _harian('2024-03-05 08:00', 'Kaliwungu', 12))
+    _check_incremental('harian')
+
+    data_store.load('harian')
+    data_store.update_record('harian', record_id, _harian('2024-04-05 08:00', 'Jatirejo', 3))
+    _check_incremental('harian')
+
+    data_store.load('harian')
+    data_store.delete_record('harian', 0)
+    _check_incremental('harian')
+
+
+@pytest.mark.parametrize('dataset', ['bulanan', 'harian'])
+def test_sqlite_rollups_match_pandas(workspace, monkeypatch, dataset):
+    monkeypatch.setenv('SMARTWASTE_STORAGE', 'sqlite')
+    storage.migrate('sqlite')
+    df = rollups._with_keys(data_store.load(dataset), dataset)
+    for name, frame in rollups.build(dataset).items():
+        expected = rollups._aggregate(df, rollups.ROLLUPS[name][1]).reset_index()
+        pd.testing.assert_frame_equal(frame, expected)
@@ -0,0 +1,123 @@
+import os
+import sys
+import threading
+import time
+
+import plotly.graph_objects as go
+
+import data_store
+import forecasting
+import model_registry
+import rollups
+import storage
+
+
+# Warm start of a fresh server process: the datasets, rollups, forecast models
+# and their predictions are loaded in a background thread, so the first
+# visitor does not pay for parsing, imports and unpickling.
+#
+#   python warmup.py [streamlit options]    start the dashboard warm
+#   SMARTWASTE_WARMUP=1 uvicorn api:app     warm the API at startup (also
+#                                           honoured by `streamlit run app.py`,
+#                                           starting with the first session)
+
+ENABLED = os.environ.get('SMARTWASTE_WARMUP', '') not in ('', '0')
+APP_PATH = os.path.join(os.path.dirname(os.path.abspath(__file__)), "app.py")
+
+_status = {'started': None, 'finished': None, 'steps': {}, 'error': None}
+_thread = None
+_lock = threading.Lock()
+
+
+def _datasets():
+    for dataset in storage.SCHEMAS:
+        data_store.load(dataset)
+
+
+def _rollups():
+    for name in rollups.ROLLUPS:
+        rollups.get(name)
+
+
+def _models():
+    # Unpickling imports pmdarima, statsmodels and scipy
+    model_registry.load_all()
+
+
+def _forecasts():
+    version = data_store.data_version('bulanan')
+    for path in forecasting.FORECAST_MODELS.values():
+        model_registry.predict(path, version)
+
+
+def _plotly():
+    # Trace classes load their validators on first use
+    go.Figure([go.Scatter(), go.Scattergl(), go.Bar(), go.Pie()])
+
+
+# Steps in the order the dashboard needs them
+STEPS = [
+    ('datasets', _datasets),
+    ('rollups', _rollups),
+    ('models', _models),
+    ('forecasts', _forecasts),
+    ('plotly', _plotly),
+]
+
+
+def _run():
+    try:
+        for name, step in STEPS:
+            start = time.perf_counter()
+            step()
+            with _lock:
+                _status['steps'][name] = time.perf_counter() - start
+    except Exception as error:
+        # A failed warm-up only means the first visitor loads the rest
+        with _lock:
+            _status['error'] = repr(error)
+    finally:
+        with _lock:
+            _status['finished'] = time.time()
+
+
+# Function to start the warm-up once per process; returns its thread
+def start():
+    global _thread
+    with _lock:
+        if _thread is None:
+            _status['started'] = time.time()
+            _thread = threading.Thread(target=_run, name='warmup', daemon=True)
+            _thread.start()
+    return _thread
+
+
+# Function to wait for the warm-up, e.g. in benchmarks. True once finished.
+def wait(timeout=None):
+    thread = _thread
+    if thread is None:
+        return False
+    thread.join(timeout)
+    return not thread.is_alive()
+
+
+# Progress of the warm-up: seconds per finished step, and any error
+def status():
+    with _lock:
+        return {**_status, 'steps': dict(_status['steps'])}
+
+
+# Start the warm-up, then the dashboard in this same process, so the
+# Streamlit sessions find the caches the warm-up filled
+def main():
+    from streamlit.web import cli
+
+    # Through the imported module, not __main__, so app.py sees this warm-up
+    import warmup
+    warmup.start()
+    sys.argv = ['streamlit', 'run', APP_PATH] + sys.argv[1:]
+    sys.exit(cli.main())
+
+
+if __name__ == '__main__':
+    main()